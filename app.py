@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox, filedialog
 from event_emitter import EventEmitter
 from widgets.tab_bar import TabBar
 from widgets.toast_message import ToastMessage
+from widgets.upload_progress import UploadProgress
 from pages.login_page import LoginPage
 from pages.main_page import MainPage
 from pages.home_page import HomePage
@@ -10,6 +11,8 @@ from pages.about import AboutPage
 from pages.coming_soon import ComingSoon
 from config import APP_NAME, VERSION
 from app_decorators import after_decorator, show_loading_popup, close_loading_popup
+from dispatch_queue import DispatchQueue
+from processors.catalog import get_catalog
 
 # =========================
 # 主应用类
@@ -23,6 +26,11 @@ class App(tk.Tk, EventEmitter):
         self.logged_in = False
 
         self.pages = {}
+        self._upload_popup = None
+
+        # 后台线程的结果统一经由派发队列回到 Tk 主线程
+        self.dispatch_queue = DispatchQueue(self)
+        self.dispatch_queue.start()
 
         self.columnconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -36,6 +44,7 @@ class App(tk.Tk, EventEmitter):
         self.tab_bar.grid(row=0, column=0, sticky="ew")
         self.tab_bar.on("tab_added", self.create_new_page)
         self.tab_bar.on("tab_selected", self.show_page)
+        self.tab_bar.on("tab_closed", self.handle_tab_closed)
         self.tab_bar.on("error", self.show_toast)
         self.tab_bar.add_tab()
 
@@ -55,6 +64,9 @@ class App(tk.Tk, EventEmitter):
         self.label_email = tk.Label(self.footer, text="", anchor="e", bg="#f0f0f0")
         self.label_email.grid(row=0, column=2, sticky="e", padx=10, pady=5)
 
+        self.label_status = tk.Label(self.footer, text="● 连接中", anchor="e", bg="#f0f0f0", fg="#888888")
+        self.label_status.grid(row=0, column=3, sticky="e", padx=10, pady=5)
+
         self.reset_footer()
 
         menu_bar = tk.Menu(self)
@@ -69,6 +81,12 @@ class App(tk.Tk, EventEmitter):
         
         self.config(menu=menu_bar)
 
+    def dispatch(self, callback):
+        """
+        在 Tk 主线程中执行 callback，可以在任意线程调用。
+        """
+        self.dispatch_queue.put(callback)
+
     def show_toast(self, message):
         ToastMessage(self, message)
 
@@ -94,6 +112,16 @@ class App(tk.Tk, EventEmitter):
         self.pages[page_id] = page
         return page
 
+    def handle_tab_closed(self, page_id):
+        """
+        标签页关闭：销毁对应页面，并通知控制器取消该页面的所有请求。
+        """
+        page = self.pages.pop(page_id, None)
+        if page is not None:
+            page.destroy()
+        self.close_upload_popup(page_id)
+        self.emit("tab_closed", page_id)
+
     def show_page(self, page_id):
         if page_id not in self.pages:
             for pid in list(self.pages.keys()):
@@ -161,12 +189,7 @@ class App(tk.Tk, EventEmitter):
             main_page = self.create_home(pid)
             self.pages[pid] = main_page
             main_page.grid(row=0, column=0, sticky="nsew")
-
-        self.fetch_profile(result.get("page_id"))
-
-    @show_loading_popup()
-    def fetch_profile(self, page_id):
-        self.emit("fetch_profile", page_id)
+        # 用户资料由控制器在登录成功后立即获取，与这里重建页面同时进行
 
     @after_decorator
     def update_user_data(self, output):
@@ -188,6 +211,22 @@ class App(tk.Tk, EventEmitter):
 
         self.reset_footer()
 
+    @after_decorator
+    def handle_connection_status(self, online):
+        if online:
+            self.label_status.config(text="● 在线", fg="#2e7d32")
+        else:
+            self.label_status.config(text="● 离线", fg="#c62828")
+            self.show_toast("无法连接到服务器，正在重试...")
+
+    @after_decorator
+    def handle_circuit_state(self, state):
+        if state == "open":
+            self.label_status.config(text="● 服务不可用", fg="#ef6c00")
+            self.show_toast("服务器连续出错，暂停发送请求")
+        elif state == "closed":
+            self.label_status.config(text="● 在线", fg="#2e7d32")
+
     def reset_footer(self):
         self.label_id.config(text=f"ID: ")
         self.label_role.config(text=f"Role: ")
@@ -208,19 +247,65 @@ class App(tk.Tk, EventEmitter):
         page_id = result.get("page_id")
         processed_lines = result.get("results", [])
         page = self.pages.get(page_id)
+        if page is None or result.get("streamed"):
+            return  # 分块处理时表格已经在 handle_text_partial 中逐块填充
+
         page.handle_text_processed(processed_lines)
 
-    @show_loading_popup()
+    @after_decorator
+    def handle_text_partial(self, result):
+        page = self.pages.get(result.get("page_id"))
+        if page is None:
+            return
+
+        page.append_processed(result.get("results", []), reset=result.get("offset") == 0)
+
     def create_cache(self, page_id):
         file_path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel 文件", "*.xlsx *.xls")])
         if file_path:
+            self.close_upload_popup()
+            self._upload_popup = UploadProgress(
+                self, page_id, on_cancel=lambda pid: self.emit("cancel_upload", pid)
+            )
             self.emit("create_cache", file_path, page_id)
 
+    def close_upload_popup(self, page_id=None):
+        """
+        关闭上传进度窗口；指定 page_id 时只在窗口属于该页面时关闭。
+        """
+        popup = self._upload_popup
+        if popup is not None and (page_id is None or popup.page_id == page_id):
+            popup.destroy()
+            self._upload_popup = None
+
+    @after_decorator
+    def handle_upload_progress(self, progress):
+        popup = self._upload_popup
+        if popup is not None and popup.page_id == progress.get("page_id"):
+            popup.update_progress(progress.get("sent", 0), progress.get("total", 0))
+
+    @after_decorator
+    def handle_upload_cancelled(self, result):
+        self.show_toast("上传已取消")
+
+    @after_decorator
+    def handle_upload_finished(self, result):
+        page_id = result.get("page_id")
+        if page_id is not None:
+            self.close_upload_popup(page_id)
+
     @after_decorator
     @close_loading_popup
+    def handle_queued_offline(self, result):
+        self.show_toast(f"无法连接到服务器，请求已保存，恢复连接后自动发送（待发送 {result.get('pending', 1)} 个）")
+
+    @after_decorator
     def handle_data_processed(self, result):
         processed_data = result.get("processed_data", [])
 
-        with open("cache.json", "w", encoding="utf-8") as f:
-            import json
-            json.dump(processed_data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+        # 交给后台写入线程保存，完成后会发出 "catalog_updated" 事件
+        get_catalog().write_async(processed_data)
+
+    @after_decorator
+    def handle_catalog_updated(self, version):
+        self.show_toast("缓存已更新")
\ No newline at end of file
@@ -2,8 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
 def after_decorator(func):
-    def wrapper(self, error):
-        self.after(0, lambda: func(self, error))
+    # 后台线程调用时，把回调放入 App 的派发队列，由 Tk 主线程批量执行
+    def wrapper(self, *args, **kwargs):
+        self.dispatch(lambda: func(self, *args, **kwargs))
     return wrapper
 
 def show_loading_popup(message="正在加载，请稍候...", timeout=5000):
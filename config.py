@@ -25,3 +25,56 @@ if MODE == "test":
     API_URL = os.getenv("API_TEST")
 else:
     API_URL = os.getenv("API_URL")
+
+
+# Pool de conexões HTTP e timeouts (em segundos)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+# Compressão gzip do corpo das requisições: tamanho mínimo em bytes (só quando o servidor anuncia suporte)
+HTTP_GZIP_MIN_SIZE = int(os.getenv("HTTP_GZIP_MIN_SIZE", "1024"))
+
+# Novas tentativas com backoff exponencial (erros de conexão e 502/503/504): número de tentativas extras,
+# espera inicial e máxima em segundos
+HTTP_RETRY_ATTEMPTS = int(os.getenv("HTTP_RETRY_ATTEMPTS", "3"))
+HTTP_RETRY_BASE_DELAY = float(os.getenv("HTTP_RETRY_BASE_DELAY", "0.5"))
+HTTP_RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "8"))
+
+# Disjuntor (circuit breaker): falhas consecutivas para abrir e segundos até permitir uma nova tentativa
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Envio de /process em blocos: tamanho do bloco e requisições simultâneas
+PROCESS_CHUNK_SIZE = int(os.getenv("PROCESS_CHUNK_SIZE", "500"))
+PROCESS_CONCURRENCY = int(os.getenv("PROCESS_CONCURRENCY", "4"))
+
+# Cache local dos resultados de /process: entradas em memória e arquivo em disco (vazio desativa o disco)
+PROCESS_CACHE_SIZE = int(os.getenv("PROCESS_CACHE_SIZE", "50000"))
+PROCESS_CACHE_FILE = os.getenv("PROCESS_CACHE_FILE", "process_cache.db")
+# Máximo de linhas no arquivo do cache; as mais antigas são descartadas primeiro
+PROCESS_CACHE_MAX_ROWS = int(os.getenv("PROCESS_CACHE_MAX_ROWS", "200000"))
+
+# Renovação antecipada do token: segundos antes de expirar
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "60"))
+
+# Pool de threads do controlador: número de workers e tamanho máximo da fila
+CONTROLLER_WORKERS = int(os.getenv("CONTROLLER_WORKERS", "4"))
+CONTROLLER_MAX_QUEUE = int(os.getenv("CONTROLLER_MAX_QUEUE", "50"))
+
+# Verificação de saúde do servidor (/ping), em segundos: intervalo normal, intervalo quando ocioso,
+# tempo sem atividade para considerar ocioso, intervalo máximo quando offline e timeout de cada ping
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "10"))
+HEALTH_IDLE_INTERVAL = float(os.getenv("HEALTH_IDLE_INTERVAL", "60"))
+HEALTH_IDLE_AFTER = float(os.getenv("HEALTH_IDLE_AFTER", "300"))
+HEALTH_MAX_BACKOFF = float(os.getenv("HEALTH_MAX_BACKOFF", "60"))
+HEALTH_TIMEOUT = float(os.getenv("HEALTH_TIMEOUT", "5"))
+
+# Fila offline de requisições: arquivo SQLite e espera inicial/máxima (segundos) entre tentativas de reenvio
+OUTBOX_FILE = os.getenv("OUTBOX_FILE", "outbox.db")
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "5"))
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "300"))
+
+# Cache local do perfil do usuário: arquivo e validade em segundos (depois disso é revalidado em segundo plano)
+PROFILE_CACHE_FILE = os.getenv("PROFILE_CACHE_FILE", "profile_cache.json")
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "86400"))
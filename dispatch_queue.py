@@ -0,0 +1,52 @@
+import time
+import queue
+import traceback
+
+# =========================
+# 跨线程界面回调队列
+# =========================
+class DispatchQueue:
+    """
+    线程安全的界面回调队列。
+
+    后台线程只把回调放入队列，由 Tk 主线程上的一个定时器批量取出执行；
+    每次执行有时间预算，超出预算的回调留到下一轮，避免大量结果同时到达时卡住事件循环。
+    """
+    def __init__(self, widget, interval=15, budget=0.008):
+        """
+        :param widget: 用于注册 after 定时器的 Tk 控件（通常是 App）
+        :param interval: 队列为空时两次检查之间的间隔（毫秒）
+        :param budget: 每一轮最多执行回调的时间（秒）
+        """
+        self.widget = widget
+        self.interval = interval
+        self.budget = budget
+        self._queue = queue.SimpleQueue()
+
+    def start(self):
+        self.widget.after(self.interval, self._drain)
+
+    def put(self, callback):
+        """
+        放入一个回调，可以在任意线程调用。
+        """
+        self._queue.put(callback)
+
+    def _drain(self):
+        deadline = time.perf_counter() + self.budget
+        while True:
+            try:
+                callback = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+
+            if time.perf_counter() >= deadline:
+                break
+
+        # 还有积压时尽快进入下一轮，否则按正常间隔检查
+        self.widget.after(1 if not self._queue.empty() else self.interval, self._drain)
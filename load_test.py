@@ -0,0 +1,245 @@
+"""
+处理器栈（Transport → TextProcessor → TextController）的压力和延迟测试。
+
+默认在进程内启动 mock_server（也可以用 --url 指向已经运行的服务器），
+模拟多个标签页同时通过 TextController 提交 /process 请求，统计吞吐量、延迟分位数和线程数。
+
+用法：
+    python load_test.py --tabs 20 --requests 10 --lines 200 --latency 0.05 --error-rate 0.02
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from mock_server import MockOptions, create_app
+from processors.controller import TextController
+from processors.outbox import Outbox
+from processors.result_cache import ProcessResultCache
+from processors.text_processor import TextProcessor
+from processors.transport import Transport
+
+
+class MockServerThread:
+    """
+    在后台线程中运行 mock_server。
+    """
+
+    def __init__(self, options, host="127.0.0.1", port=0):
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # 不逐条打印请求日志
+        self.app = create_app(options)
+        self.server = make_server(host, port, self.app, threaded=True)
+        self.url = f"http://{host}:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-server", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class ThreadSampler:
+    """
+    定期记录进程中的线程数，得到峰值。
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="thread-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+
+class LoadTest:
+    """
+    模拟 tabs 个标签页，每个标签页依次提交 requests 次 /process（每次 lines 行），
+    等待结果后再提交下一次，记录每次请求从提交到收到 "text_processed" 的时间。
+    """
+
+    def __init__(self, controller, tabs, requests, lines, repeat_ratio=0.0, timeout=60):
+        self.controller = controller
+        self.tabs = tabs
+        self.requests = requests
+        self.lines = lines
+        self.repeat_ratio = repeat_ratio  # 与之前的请求重复的行的比例（命中结果缓存）
+        self.timeout = timeout
+
+        self.latencies = []
+        self.outcomes = {}                # 结果类型 → 次数
+        self._waiters = {}                # page_id → (Event, 结果列表)
+        self._lock = threading.Lock()
+
+        for event in ("text_processed", "queued_offline", "error"):
+            controller.on(event, lambda result, event=event: self._on_result(event, result))
+
+    def _on_result(self, event, result):
+        waiter = self._waiters.get(result.get("page_id"))
+        if waiter is not None:
+            waiter[1].append(event)
+            waiter[0].set()
+
+    def _make_text(self, page_id, index):
+        lines = []
+        for n in range(self.lines):
+            if random.random() < self.repeat_ratio:
+                lines.append(f"SKU-{n:05d} 常用商品 x {n % 9 + 1}")
+            else:
+                lines.append(f"SKU-{page_id}-{index}-{n:05d} 商品 {random.randint(0, 10 ** 6)} x {n % 9 + 1}")
+        return "\n".join(lines)
+
+    def _run_tab(self, page_id):
+        done = threading.Event()
+        events = []
+        self._waiters[page_id] = (done, events)
+        for index in range(self.requests):
+            done.clear()
+            events.clear()
+            started = time.perf_counter()
+            self.controller.process(self._make_text(page_id, index), page_id)
+            outcome = events[0] if done.wait(self.timeout) else "timeout"
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+                if outcome == "text_processed":
+                    self.latencies.append(elapsed)
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._run_tab, args=(page_id,), name=f"tab-{page_id}")
+            for page_id in range(1, self.tabs + 1)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="处理器栈的压力和延迟测试")
+    parser.add_argument("--url", help="已经运行的服务器地址；不指定时在进程内启动 mock_server")
+    parser.add_argument("--email", default="load@test.local")
+    parser.add_argument("--password", default="load-test")
+    parser.add_argument("--tabs", type=int, default=10, help="同时工作的标签页数")
+    parser.add_argument("--requests", type=int, default=10, help="每个标签页提交的请求数")
+    parser.add_argument("--lines", type=int, default=100, help="每个请求的行数")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="与之前请求重复的行的比例")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock_server 每个请求的延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mock_server 随机附加的延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock_server 随机返回 503 的比例")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="mock_server 访问令牌的有效期（秒）")
+    parser.add_argument("--payload-size", type=int, default=0, help="mock_server 每条结果的填充字节数")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        options = MockOptions(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              token_ttl=args.token_ttl, payload_size=args.payload_size)
+        server = MockServerThread(options).start()
+        url = server.url
+
+    threads_before = threading.active_count()
+    sampler = ThreadSampler().start()
+
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    transport = Transport(base_url=url)
+    processor = TextProcessor(transport=transport)
+    login = processor.login(args.email, args.password)
+    if not login.get("success"):
+        raise SystemExit(f"登录失败：{login.get('error')}")
+
+    # 结果缓存只放在内存中，发件箱写到临时目录，不影响本地的缓存文件
+    controller = TextController(
+        processor,
+        result_cache=ProcessResultCache(path=None),
+        outbox=Outbox(os.path.join(workdir, "outbox.db")),
+    )
+    test = LoadTest(controller, args.tabs, args.requests, args.lines, args.repeat_ratio)
+    elapsed = test.run()
+    sampler.stop()
+
+    completed = len(test.latencies)
+    report = {
+        "url": url,
+        "tabs": args.tabs,
+        "requests": args.tabs * args.requests,
+        "lines_per_request": args.lines,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "throughput_lines_s": round(completed * args.lines / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(test.latencies) * 1000, 1) if test.latencies else 0.0,
+            "p50": round(percentile(test.latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(test.latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(test.latencies, 0.99) * 1000, 1),
+            "max": round(max(test.latencies, default=0.0) * 1000, 1),
+        },
+        "outcomes": test.outcomes,
+        "threads": {"before": threads_before, "peak": sampler.peak, "after": threading.active_count()},
+        "executor": controller.metrics(),
+        "cache": controller.result_cache.stats(),
+        "breaker": transport.breaker.state,
+    }
+    if server is not None:
+        report["server"] = server.app.config["mock.stats"].snapshot()
+        server.stop()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        return
+
+    latency = report["latency_ms"]
+    print(f"服务器: {url}")
+    print(f"请求: {report['requests']}（{args.tabs} 个标签页 × {args.requests}，每次 {args.lines} 行），"
+          f"用时 {report['elapsed_s']} 秒")
+    print(f"吞吐量: {report['throughput_rps']} 请求/秒，{report['throughput_lines_s']} 行/秒")
+    print(f"延迟(ms): 平均 {latency['mean']}  p50 {latency['p50']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  最大 {latency['max']}")
+    print(f"结果: {report['outcomes']}")
+    print(f"线程: 开始 {report['threads']['before']}，峰值 {report['threads']['peak']}，"
+          f"结束 {report['threads']['after']}")
+    print(f"控制器线程池: {report['executor']}")
+    print(f"结果缓存: {report['cache']}")
+    print(f"断路器: {report['breaker']}")
+    if "server" in report:
+        server_stats = report["server"]
+        print(f"服务器统计: 调用 {server_stats['calls']}，注入错误 {server_stats['injected_errors']}，"
+              f"过期令牌 {server_stats['expired_tokens']}，"
+              f"收 {server_stats['bytes_in']}/{server_stats['bytes_in_raw']} 字节，"
+              f"发 {server_stats['bytes_out']}/{server_stats['bytes_out_raw']} 字节")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,47 @@
 from app import App
 from processors.controller import TextController
 from processors.text_processor import TextProcessor
-import threading
-import requests
-from config import API_URL
-
-def make_request():
-    requests.get(f"{API_URL}/ping")
-    t = threading.Timer(10, make_request)
-    t.daemon = True
-    t.start()
+from processors.catalog import get_catalog
+from processors.health import get_health_monitor
+from processors.transport import get_transport
 
 # =========================
 # 启动
 # =========================
 if __name__ == "__main__":
-    try:
-        make_request()  # 启动定时请求
-    except Exception as e:
-        print(f"Error occurred: {e}")
-
     app = App()
     processor = TextProcessor()
     controller = TextController(processor)
 
     app.on("login", controller.login)
-    app.on("fetch_profile", controller.fetch_profile)
     app.on("process", controller.process)
     app.on("create_cache", controller.create_cache)
+    app.on("tab_closed", controller.cancel_page)
+    app.on("cancel_upload", controller.cancel_upload)
 
     controller.on("login_success", lambda output: app.handle_login_success(output))
     controller.on("profile_fetched", lambda output: app.update_user_data(output))
     controller.on("text_processed", lambda output: app.handle_text_processed(output))
+    controller.on("text_partial", lambda output: app.handle_text_partial(output))
     controller.on("data_processed", lambda output: app.handle_data_processed(output))
+    controller.on("upload_progress", lambda output: app.handle_upload_progress(output))
+    controller.on("upload_cancelled", lambda output: app.handle_upload_cancelled(output))
+    controller.on("upload_finished", lambda output: app.handle_upload_finished(output))
+    controller.on("queued_offline", lambda output: app.handle_queued_offline(output))
     controller.on("error", lambda error: app.handle_error(error))
 
+    catalog = get_catalog()
+    catalog.on("catalog_updated", lambda version: app.handle_catalog_updated(version))
+    catalog.on("error", lambda error: app.handle_error(error))
+
+    health = get_health_monitor()
+    health.on("status_changed", lambda online: app.handle_connection_status(online))
+    health.on("status_changed", lambda online: online and controller.replay_outbox())  # 恢复连接后重放离线请求
+    health.start()  # 启动健康检查线程
+
+    breaker = get_transport().breaker
+    breaker.on("state_changed", lambda state: app.handle_circuit_state(state))
+    # 半开时重放离线请求，第一个请求就是试探请求；闭合后继续重放剩下的
+    breaker.on("state_changed", lambda state: state in ("half_open", "closed") and controller.replay_outbox())
+
     app.mainloop()
\ No newline at end of file
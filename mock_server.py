@@ -0,0 +1,333 @@
+"""
+本地模拟后端，用于在没有正式 API 的情况下测试 TextProcessor / TextController。
+
+用法：
+    python mock_server.py --port 5000 --latency 0.2 --error-rate 0.05 --token-ttl 120
+然后在 .env 中把 API_URL（或 MODE=test 时的 API_TEST）指向 http://127.0.0.1:5000。
+压力测试见 load_test.py。
+
+实现 /login、/refresh、/profile、/process、/create-cache、/ping：
+- 访问令牌是带 exp 的 JWT，--token-ttl 秒后过期（返回 401），可以测试刷新和提前续期。
+- --latency / --jitter 为每个请求增加延迟，--error-rate 为随机返回 503 的比例（/ping 和 /stats 除外）。
+- --payload-size 为 /process 的每条结果和 /create-cache 的每个产品附加的填充字节数，模拟大响应。
+- 支持 gzip：在每个响应中通过 Accept-Encoding 声明接受压缩的请求体，
+  并按客户端的 Accept-Encoding 压缩较大的响应。--bandwidth 按实际传输的字节数模拟慢速链路，
+  可以用 --no-gzip 启动后对比。
+- GET /stats 返回各接口的调用次数、注入的错误数和收发字节数；POST /config 可以在运行时修改上述参数。
+"""
+import argparse
+import gzip
+import io
+import random
+import re
+import threading
+import time
+import uuid
+
+import jwt
+import pandas as pd
+from flask import Flask, jsonify, request
+
+GZIP_MIN_SIZE = 1024
+NUMBER_PATTERN = re.compile(r"\d+")
+JWT_SECRET = "mock-server-secret-for-local-testing-only"
+UNTHROTTLED_PATHS = ("/ping", "/stats", "/config")  # 不注入延迟和错误的接口
+
+
+class MockOptions:
+    """
+    模拟后端的可调参数。
+    """
+
+    FIELDS = ("gzip_enabled", "bandwidth", "latency", "jitter", "error_rate", "token_ttl", "payload_size")
+
+    def __init__(self, gzip_enabled=True, bandwidth=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 token_ttl=3600, payload_size=0):
+        self.gzip_enabled = gzip_enabled  # 是否支持压缩的请求体和响应
+        self.bandwidth = bandwidth        # 模拟的链路带宽（字节/秒），0 表示不限速
+        self.latency = latency            # 每个请求的固定延迟（秒）
+        self.jitter = jitter              # 在固定延迟上随机增加 0 ~ jitter 秒
+        self.error_rate = error_rate      # 随机返回 503 的比例（0 ~ 1）
+        self.token_ttl = token_ttl        # 访问令牌的有效期（秒）
+        self.payload_size = payload_size  # 每条结果附加的填充字节数
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def update(self, values):
+        """
+        按字典更新参数（忽略未知字段），类型与当前值保持一致。
+        """
+        for field in self.FIELDS:
+            if field in values:
+                setattr(self, field, type(getattr(self, field))(values[field]))
+
+
+class MockStats:
+    """
+    线程安全的收发字节统计。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "bytes_in": 0,           # 实际收到的请求体字节数（压缩后）
+            "bytes_in_raw": 0,       # 解压后的请求体字节数
+            "bytes_out": 0,          # 实际发送的响应体字节数（压缩后）
+            "bytes_out_raw": 0,      # 压缩前的响应体字节数
+            "injected_errors": 0,    # 按 error_rate 注入的 503 数
+            "expired_tokens": 0,     # 因令牌过期返回的 401 数
+            "calls": {},
+        }
+
+    def add(self, **values):
+        with self._lock:
+            for key, value in values.items():
+                self.counters[key] += value
+
+    def call(self, endpoint):
+        with self._lock:
+            self.counters["requests"] += 1
+            calls = self.counters["calls"]
+            calls[endpoint] = calls.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.counters, "calls": dict(self.counters["calls"])}
+
+
+class GzipRequestMiddleware:
+    """
+    WSGI 中间件：解压 Content-Encoding: gzip 的请求体，并记录收到的字节数。
+    """
+
+    def __init__(self, wsgi_app, options, stats):
+        self.wsgi_app = wsgi_app
+        self.options = options
+        self.stats = stats
+
+    def __call__(self, environ, start_response):
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        if length:
+            body = environ["wsgi.input"].read(length)
+        elif environ.get("wsgi.input_terminated"):
+            body = environ["wsgi.input"].read()  # 分块传输编码，没有 Content-Length
+        else:
+            body = b""
+        raw = body
+
+        if environ.get("HTTP_CONTENT_ENCODING", "").lower() == "gzip":
+            if not self.options.gzip_enabled:
+                start_response("415 Unsupported Media Type", [("Content-Type", "text/plain")])
+                return [b"gzip request bodies are not accepted"]
+            raw = gzip.decompress(body)
+            del environ["HTTP_CONTENT_ENCODING"]
+
+        environ["wsgi.input"] = io.BytesIO(raw)
+        environ["CONTENT_LENGTH"] = str(len(raw))
+        environ["mock.bytes_in"] = len(body)
+        self.stats.add(bytes_in=len(body), bytes_in_raw=len(raw))
+        return self.wsgi_app(environ, start_response)
+
+
+def parse_line(line, payload_size=0):
+    """
+    把一行文本解析为与正式后端相同结构的结果：第一个词作为 SKU，最后一个数字作为数量。
+    """
+    words = line.split()
+    numbers = NUMBER_PATTERN.findall(line)
+    result = {
+        "sku": words[0] if words else "",
+        "name": line,
+        "quantity": int(numbers[-1]) if numbers else 1,
+        "price": 0,
+    }
+    if payload_size:
+        result["padding"] = "x" * payload_size
+    return result
+
+
+def read_catalog(file, payload_size=0):
+    """
+    把上传的 Excel 转换为 processed_data（产品列表）。
+    """
+    df = pd.read_excel(file).fillna("")
+    products = []
+    for row in df.to_dict(orient="records"):
+        sku = str(row.get("sku", "")).strip()
+        product = {
+            "name": row.get("name", ""),
+            "price": row.get("price") or 0,
+            "quantity": row.get("quantity") or 0,
+            "sku": sku,
+            "skus": [sku] if sku else [],
+            "stock": row.get("stock") or 0,
+        }
+        if payload_size:
+            product["padding"] = "x" * payload_size
+        products.append(product)
+    return products
+
+
+def create_app(options=None):
+    options = options or MockOptions()
+    stats = MockStats()
+    refresh_tokens = {}  # refresh_token → email
+    lock = threading.Lock()
+    app = Flask(__name__)
+    app.config["mock.options"] = options
+    app.config["mock.stats"] = stats
+
+    def issue_access_token(email):
+        now = int(time.time())
+        claims = {"sub": email, "iat": now, "exp": now + int(options.token_ttl), "jti": uuid.uuid4().hex}
+        return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+    def current_user():
+        """
+        校验 Authorization 头中的访问令牌，返回用户邮箱；无效或过期时返回 None。
+        """
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Bearer "):
+            return None
+        try:
+            return jwt.decode(header[7:], JWT_SECRET, algorithms=["HS256"])["sub"]
+        except jwt.ExpiredSignatureError:
+            stats.add(expired_tokens=1)
+            return None
+        except jwt.PyJWTError:
+            return None
+
+    @app.before_request
+    def inject_faults():
+        if request.path in UNTHROTTLED_PATHS:
+            return None
+        delay = options.latency + random.uniform(0, options.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if options.error_rate and random.random() < options.error_rate:
+            stats.add(injected_errors=1)
+            return jsonify(error="服务暂时不可用（模拟）"), 503
+        return None
+
+    @app.after_request
+    def encode_response(response):
+        if response.direct_passthrough:
+            return response
+
+        data = response.get_data()
+        stats.add(bytes_out_raw=len(data))
+        accepts_gzip = "gzip" in request.headers.get("Accept-Encoding", "").lower()
+        if options.gzip_enabled:
+            response.headers["Accept-Encoding"] = "gzip"
+            if accepts_gzip and len(data) >= GZIP_MIN_SIZE and "Content-Encoding" not in response.headers:
+                data = gzip.compress(data, compresslevel=6)
+                response.set_data(data)
+                response.headers["Content-Encoding"] = "gzip"
+                response.headers["Vary"] = "Accept-Encoding"
+        stats.add(bytes_out=len(data))
+
+        if options.bandwidth:
+            # 按实际传输的字节数模拟慢速链路
+            time.sleep((request.environ.get("mock.bytes_in", 0) + len(data)) / options.bandwidth)
+        return response
+
+    @app.post("/login")
+    def login():
+        stats.call("login")
+        body = request.get_json(silent=True) or {}
+        email = body.get("email")
+        if not email or not body.get("password"):
+            return jsonify(error="邮箱或密码错误"), 401
+        refresh_token = uuid.uuid4().hex
+        with lock:
+            refresh_tokens[refresh_token] = email
+        return jsonify(access_token=issue_access_token(email), refresh_token=refresh_token)
+
+    @app.post("/refresh")
+    def refresh():
+        stats.call("refresh")
+        token = (request.get_json(silent=True) or {}).get("refresh_token")
+        with lock:
+            email = refresh_tokens.get(token)
+        if email is None:
+            return jsonify(error="刷新令牌无效"), 401
+        return jsonify(access_token=issue_access_token(email))
+
+    @app.get("/profile")
+    def profile():
+        stats.call("profile")
+        email = current_user()
+        if email is None:
+            return jsonify(error="未授权"), 401
+        user_id = uuid.uuid5(uuid.NAMESPACE_DNS, email).int % 100000
+        return jsonify(id=user_id, role="admin", email=email)
+
+    @app.post("/process")
+    def process():
+        stats.call("process")
+        if current_user() is None:
+            return jsonify(error="未授权"), 401
+        lines = (request.get_json(silent=True) or {}).get("lines", [])
+        return jsonify(results=[parse_line(line, options.payload_size) for line in lines])
+
+    @app.post("/create-cache")
+    def create_cache():
+        stats.call("create-cache")
+        if current_user() is None:
+            return jsonify(error="未授权"), 401
+        file = request.files.get("file")
+        if file is None:
+            return jsonify(error="缺少文件"), 400
+        return jsonify(processed_data=read_catalog(file, options.payload_size))
+
+    @app.get("/ping")
+    def ping():
+        stats.call("ping")
+        return jsonify(status="ok")
+
+    @app.get("/stats")
+    def get_stats():
+        return jsonify(stats.snapshot())
+
+    @app.get("/config")
+    def get_config():
+        return jsonify(options.to_dict())
+
+    @app.post("/config")
+    def set_config():
+        options.update(request.get_json(silent=True) or {})
+        return jsonify(options.to_dict())
+
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, options, stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟后端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--no-gzip", action="store_true", help="不支持压缩（用于对比）")
+    parser.add_argument("--bandwidth", type=int, default=0, help="模拟带宽，字节/秒，0 表示不限速")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机附加的延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 503 的比例（0 ~ 1）")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="访问令牌的有效期（秒）")
+    parser.add_argument("--payload-size", type=int, default=0, help="每条结果附加的填充字节数")
+    args = parser.parse_args()
+
+    options = MockOptions(
+        gzip_enabled=not args.no_gzip,
+        bandwidth=args.bandwidth,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        token_ttl=args.token_ttl,
+        payload_size=args.payload_size,
+    )
+    create_app(options).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pages.page import Page  # 自定义的页面类，用于处理页面切换
 from widgets import Mytable, MyText, ToastMessage  # 自定义的控件：表格、文本编辑器、提示信息
-from pages.utils import wrap_number_to_lines, generate_product_map, load_cache, generate_aliases  # 工具函数
+from pages.utils import warn_empty_cache  # 工具函数
+from pages.marking import MarkingPipeline, NumberRule, load_presets  # 文本标记规则
+from processors.catalog import get_catalog  # 进程内共享的产品目录
+from processors.matcher import match_columns  # 批量匹配引擎
 from openpyxl import Workbook, load_workbook  # 用于处理Excel文件
 from openpyxl.utils import get_column_letter  # 计算Excel中的列字母
 from openpyxl.styles import Font  # 用于Excel中的字体样式
@@ -43,6 +46,7 @@ class MainPage(Page):
             ("标记数量-后面", lambda: self.run_algorithm("qty", "backward")),
             ("标记价格-前面", lambda: self.run_algorithm("price", "forward")),
             ("标记价格-后面", lambda: self.run_algorithm("price", "backward")),
+            ("预设标记...", self.show_preset_menu),  # 一次应用多条标记规则
             ("文本处理", None),
             ("匹配文本内容", self.process_text),
             ("表格处理", None),
@@ -125,7 +129,10 @@ class MainPage(Page):
 
     def show_cache(self):
         if messagebox.askyesno("警告", "确定清空表格内容?"):
-            cache = load_cache()
+            cache = get_catalog().ensure_loaded()
+            if cache is None:
+                warn_empty_cache()
+                return
 
             self.table.set_data(cache)
 
@@ -207,9 +214,26 @@ class MainPage(Page):
         """
         根据选择的标记类型和方向运行算法（如标记数量、标记价格）。
         """
-        text = self.editor.get("1.0", tk.END)  # 获取文本框中的内容
-        new_text = wrap_number_to_lines(text, key, direction)  # 使用 wrap_number_to_lines 包装文本
-        self.editor.overwrite(new_text)  # 用新的文本覆盖原有文本
+        self.apply_marking(MarkingPipeline([NumberRule(key, direction)]))
+
+    def apply_marking(self, pipeline):
+        """
+        用标记流水线处理文本框中的内容：每行一次性应用所有规则。
+        编辑器按流水线分别记录被修改过的行，再次执行同一种标记时只处理这些行，
+        并且只替换内容发生变化的行，保留撤销记录、标签和滚动位置。
+        """
+        self.editor.transform_lines(pipeline.apply_line, key=pipeline.key)
+
+    def show_preset_menu(self):
+        """
+        在“预设标记”按钮旁弹出预设列表（内置预设和 marking_presets.json 中保存的预设）。
+        """
+        menu = tk.Menu(self, tearoff=0)
+        for name, pipeline in load_presets().items():
+            menu.add_command(label=name, command=lambda p=pipeline: self.apply_marking(p))
+
+        x, y = self.winfo_pointerxy()
+        menu.tk_popup(x, y)
 
     def get_sku(self):
         """
@@ -236,6 +260,39 @@ class MainPage(Page):
         """
         处理从页面处理返回的数据，过滤出所需的字段并更新表格。
         """
+        result = self._match_processed(data)
+        if not result:
+            return  # 如果没有匹配结果，则不做任何操作
+
+        # 将匹配到的结果更新到表格中
+        self.table.set_data(result)  # 更新表格数据
+        self.table.set_columns(["sku", "name", "quantity", "price"])  # 设置表格的列名
+        self.table.set_editable_columns(["name", "quantity", "price"])  # 设置可编辑的列
+
+
+    def append_processed(self, data, reset=False):
+        """
+        分块处理时逐块追加结果：reset 为 True（第一块）时先清空表格。
+        """
+        if not reset and get_catalog().products is None:
+            return  # 缓存为空，第一块时已经提示过
+
+        result = self._match_processed(data)
+        if result is None:
+            return  # 缓存为空，不做任何操作
+
+        if not reset:
+            self.table.append_rows(result)  # 只插入新的行，已有的行不重建
+            return
+
+        self.table.set_data(result)
+        self.table.set_columns(["sku", "name", "quantity", "price"])  # 设置表格的列名
+        self.table.set_editable_columns(["name", "quantity", "price"])  # 设置可编辑的列
+
+    def _match_processed(self, data):
+        """
+        过滤出处理结果中需要的字段，并根据 SKU 匹配目录。
+        """
         desired_keys = ["sku", "name", "quantity", "price"]  # 需要提取的字段
 
         # 过滤出每一项的这些字段
@@ -245,53 +302,27 @@ class MainPage(Page):
         ]
 
         # 根据 SKU 匹配数据
-        result = self.match(filtered, mode="sku")
-        if not result:
-            return  # 如果没有匹配结果，则不做任何操作
-
-        # 将匹配到的结果更新到表格中
-        self.table.set_data(result)  # 更新表格数据
-        self.table.set_columns(["sku", "name", "quantity", "price"])  # 设置表格的列名
-        self.table.set_editable_columns(["name", "quantity", "price"])  # 设置可编辑的列
-
+        return self.match(filtered, mode="sku")
 
     def match(self, data, mode="both"):
         """
         将输入数据与缓存中的产品数据进行匹配。
         根据指定的模式（"sku", "price", 或 "both"）来更新输入数据中的 sku 和 price 字段。
         """
-        cache = load_cache()  # 加载缓存
+        catalog = get_catalog()  # 共享目录，只有缓存文件变化时才会重新加载
+        cache = catalog.ensure_loaded()
         if not cache:
+            if cache is None:
+                warn_empty_cache()
             return  # 如果缓存为空，则返回空
 
-        price_map = generate_product_map(cache)  # 生成商品的 SKU 到产品的映射
+        # 把 SKU 列与目录的别名索引做一次向量化连接，得到价格列和 SKU 列
+        columns = match_columns((item.get("sku") for item in data), catalog, mode)
 
-        # 遍历数据中的每一项（如每个商品）
-        for item in data:
-            original_sku = item.get("sku")  # 获取原始的 SKU
-            aliases = generate_aliases(original_sku)  # 获取 SKU 的别名列表
-
-            matched_price = 0  # 初始化匹配的价格为 0
-            matched_product = None  # 初始化匹配的产品为 None
-
-            # 遍历每个别名，查找对应的产品
-            for alias in aliases:
-                product = price_map.get(alias)  # 在 price_map 中查找该别名对应的产品
-                if product:
-                    price = product.get("price", 0)  # 获取产品的价格
-                    if price > matched_price:  # 如果找到更高的价格，更新匹配的价格和产品
-                        matched_price = price
-                        matched_product = product
-
-            # 根据模式更新数据中的价格和 SKU
-            if mode in ("price", "both"):
-                item["price"] = "" if matched_price == 0 else matched_price  # 如果没有匹配到价格，则留空
-
-            if mode in ("sku", "both"):
-                if matched_product:
-                    item["sku"] = matched_product.get("sku", "")  # 如果找到了匹配的产品，更新 SKU
-                else:
-                    item["sku"] = ""  # 如果没有匹配到产品，SKU 设为空
+        # 将匹配结果写回每一项（未匹配的价格或 SKU 为空字符串）
+        for key, values in columns.items():
+            for item, value in zip(data, values):
+                item[key] = value
 
         return data  # 返回更新后的数据
 
@@ -0,0 +1,132 @@
+import os
+import re
+import json
+from pages.utils import wrap_number, wrap_letter
+
+PRESETS_FILE = "marking_presets.json"
+
+class NumberRule:
+    """
+    数字标记规则：把一行中的第一个（forward）或最后一个（backward）数字包裹为 [key:数字]。
+    """
+    def __init__(self, key=None, direction="forward"):
+        self.key = key
+        self.direction = direction
+
+    def apply(self, line):
+        return wrap_number(line, key=self.key, direction=self.direction)
+
+    def to_dict(self):
+        return {"type": "number", "key": self.key, "direction": self.direction}
+
+class LetterRule:
+    """
+    字母后缀标记规则：如果一行以指定的单个字母结尾，则包裹为 [key:字母]。
+    """
+    def __init__(self, letters, key=None, ignore_case=True):
+        self.letters = list(letters)
+        self.key = key
+        self.ignore_case = ignore_case
+
+    def apply(self, line):
+        return wrap_letter(line, self.letters, key=self.key, ignore_case=self.ignore_case)
+
+    def to_dict(self):
+        return {"type": "letter", "letters": self.letters, "key": self.key, "ignore_case": self.ignore_case}
+
+class RegexRule:
+    """
+    自定义正则规则：把一行中第一个不在方括号内的匹配项包裹为 [key:内容]。
+    如果正则包含分组，则只包裹第一个分组的内容。
+    """
+    def __init__(self, pattern, key=None):
+        self.pattern = pattern
+        self.key = key
+        self._regex = re.compile(pattern)
+
+    def apply(self, line):
+        depth = 0
+        brackets = []  # 记录每个位置是否在方括号内
+        for char in line:
+            if char == "[":
+                depth += 1
+            brackets.append(depth > 0)
+            if char == "]" and depth > 0:
+                depth -= 1
+
+        for match in self._regex.finditer(line):
+            group = 1 if self._regex.groups else 0
+            start, end = match.span(group)
+            if start == end or any(brackets[start:end]):
+                continue
+            value = line[start:end]
+            replacement = f"[{self.key}:{value}]" if self.key else f"[{value}]"
+            return line[:start] + replacement + line[end:]
+        return line
+
+    def to_dict(self):
+        return {"type": "regex", "pattern": self.pattern, "key": self.key}
+
+RULE_TYPES = {
+    "number": lambda d: NumberRule(d.get("key"), d.get("direction", "forward")),
+    "letter": lambda d: LetterRule(d.get("letters", []), d.get("key"), d.get("ignore_case", True)),
+    "regex": lambda d: RegexRule(d["pattern"], d.get("key")),
+}
+
+class MarkingPipeline:
+    """
+    有序的标记规则列表。每一行依次经过所有规则，整个文本只需拆分和合并一次。
+    """
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    def apply_line(self, line):
+        """
+        对单行依次应用所有规则。
+        """
+        for rule in self.rules:
+            line = rule.apply(line)
+        return line
+
+    def apply(self, text):
+        """
+        对文本的每一行应用所有规则，返回处理后的文本。
+        """
+        return "\n".join(self.apply_line(line) for line in text.splitlines())
+
+    def to_list(self):
+        return [rule.to_dict() for rule in self.rules]
+
+    @property
+    def key(self):
+        """
+        规则列表的标识，用于区分不同的标记操作（例如编辑器按 key 分别记录脏行）。
+        """
+        return json.dumps(self.to_list(), ensure_ascii=False, sort_keys=True)
+
+    @classmethod
+    def from_list(cls, items):
+        return cls(RULE_TYPES[item["type"]](item) for item in items)
+
+# 内置预设：名称 → 规则列表
+DEFAULT_PRESETS = {
+    "数量在前+价格在后": MarkingPipeline([NumberRule("qty", "forward"), NumberRule("price", "backward")]),
+    "价格在前+数量在后": MarkingPipeline([NumberRule("price", "forward"), NumberRule("qty", "backward")]),
+}
+
+def load_presets(file_path=PRESETS_FILE):
+    """
+    加载标记预设：内置预设加上保存在 JSON 文件中的预设（同名时以文件为准）。
+    文件格式为 {"预设名称": [{"type": "number", "key": "qty", "direction": "forward"}, ...]}
+    :param file_path: 预设文件路径
+    :return: 名称到 MarkingPipeline 的字典
+    """
+    presets = dict(DEFAULT_PRESETS)
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                for name, items in json.load(f).items():
+                    presets[name] = MarkingPipeline.from_list(items)
+        except (ValueError, KeyError, TypeError, re.error) as e:
+            print(f"读取标记预设失败: {e}")
+    return presets
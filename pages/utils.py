@@ -15,12 +15,18 @@ def load_cache(file_path='cache.json'):
             return json.load(f)  # 解析 JSON 格式的缓存文件内容
     else:
         # 文件不存在时，弹出警告框
-        messagebox.showwarning(
-            "警告",
-            "缓存为空。请先上传一个 Excel 文件。"
-        )
+        warn_empty_cache()
         return None  # 返回 None，表示没有找到缓存文件
-    
+
+def warn_empty_cache():
+    """
+    弹出缓存为空的警告，提示用户先上传 Excel 文件。
+    """
+    messagebox.showwarning(
+        "警告",
+        "缓存为空。请先上传一个 Excel 文件。"
+    )
+
 def generate_product_map(products):
     """
     生成 SKU 到产品的映射表。此函数根据产品的 SKU 和价格来构建映射。
@@ -39,6 +45,41 @@ def generate_product_map(products):
 
     return sku_product_map  # 返回 SKU 到产品的映射表
 
+# 匹配数字（可能包含小数），紧挨着 '[' 或 ']' 的数字不算
+NUMBER_PATTERN = re.compile(r"(?<![\[\d])(\d+(?:\s*[.,]\s*\d+)?)(?![\d\]])")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def find_number_span(text, direction="forward"):
+    """
+    在一行文本中找出需要包裹的数字的位置。
+    先根据行首/行尾的方括号确定可搜索的范围，再用一次正则扫描找出数字：
+    - "forward"：如果行以 '[' 开头，则从第一个 ']' 开始搜索，返回第一个数字
+    - "backward"：如果行以 ']' 结尾，则只在最后一个 '[' 之前搜索，返回最后一个数字
+    :param text: 单行文本
+    :param direction: 处理方向，"forward" 或 "backward"
+    :return: (start, end)，没有可包裹的数字时返回 None
+    """
+    if not text:
+        return None
+
+    if direction == "forward":
+        start = text.find("]") if text[0] == "[" else 0
+        if start < 0:
+            return None  # 整行都在方括号内
+        match = NUMBER_PATTERN.search(text, start)
+        return match.span(1) if match else None
+
+    if direction == "backward":
+        end = text.rfind("[") if text[-1] == "]" else len(text) - 1
+        if end < 0:
+            return None  # 整行都在方括号内
+        span = None
+        for match in NUMBER_PATTERN.finditer(text, 0, end + 1):
+            span = match.span(1)  # 只保留最后一个匹配
+        return span
+
+    return None
+
 def wrap_number(text, key=None, direction="forward"):
     """
     将文本中的数字进行包裹，包裹形式为 [key:数字] 或 [数字]。
@@ -48,56 +89,16 @@ def wrap_number(text, key=None, direction="forward"):
     :param direction: 处理方向，"forward" 从前往后处理，"backward" 从后往前处理
     :return: 处理后的文本
     """
-    inside_brackets = False  # 用于标记是否在方括号内
+    span = find_number_span(text, direction)
+    if span is None:
+        return text  # 如果没有找到数字，则返回原文本
 
-    # 正则表达式，用于匹配数字（可能包含小数）
-    pattern = re.compile(r"(?<![\[\d])(\d+(?:\s*[.,]\s*\d+)?)(?![\d\]])")
+    start_pos, end_pos = span
+    clean_number = WHITESPACE_PATTERN.sub("", text[start_pos:end_pos])  # 清理数字中的空格
 
-    if direction == "forward":
-        # 从文本开头开始遍历
-        i = 0
-        while i < len(text):
-            if text[i] == "[":
-                inside_brackets = True
-            elif text[i] == "]":
-                inside_brackets = False
-
-            if not inside_brackets:
-                match = pattern.search(text, i)  # 查找数字
-                if match:
-                    raw_number = match.group(1)  # 获取原始数字
-                    start_pos, end_pos = match.span(1)  # 获取匹配的开始和结束位置
-                    clean_number = re.sub(r"\s*", "", raw_number)  # 清理数字中的空格
-
-                    # 根据是否提供 key 来决定包裹格式
-                    replacement = f"[{key}:{clean_number}]" if key else f"[{clean_number}]"
-                    return text[:start_pos] + replacement + text[end_pos:]
-                break
-            i += 1
-
-    elif direction == "backward":
-        # 从文本结尾开始遍历
-        i = len(text) - 1
-        while i >= 0:
-            if text[i] == "]":
-                inside_brackets = True
-            elif text[i] == "[":
-                inside_brackets = False
-
-            if not inside_brackets:
-                matches = list(pattern.finditer(text[:i + 1]))  # 查找所有数字的匹配项
-                if matches:
-                    match = matches[-1]  # 选择最后一个匹配
-                    raw_number = match.group(1)
-                    start_pos, end_pos = match.span(1)
-
-                    clean_number = re.sub(r"\s*", "", raw_number)  # 清理数字中的空格
-                    replacement = f"[{key}:{clean_number}]" if key else f"[{clean_number}]"
-                    return text[:start_pos] + replacement + text[end_pos:]
-                break
-            i -= 1
-
-    return text  # 如果没有找到数字，则返回原文本
+    # 根据是否提供 key 来决定包裹格式
+    replacement = f"[{key}:{clean_number}]" if key else f"[{clean_number}]"
+    return text[:start_pos] + replacement + text[end_pos:]
 
 def wrap_number_to_lines(text, key=None, direction="forward"):
     """
@@ -120,6 +121,9 @@ def wrap_letter(text, letters, key=None, ignore_case=True):
     :param ignore_case: 是否忽略大小写，默认为 True
     :return: 处理后的文本
     """
+    if not text:
+        return text  # 空行没有可处理的字母
+
     last_char = text[-1]  # 获取文本的最后一个字符
 
     if ignore_case:
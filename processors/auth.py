@@ -1,3 +1,73 @@
+import time
+import threading
+import jwt
+
+
+def token_expiry(token):
+    """
+    读取 JWT 中的过期时间 exp（Unix 时间戳），不校验签名。
+    令牌为空、无法解析或没有 exp 时返回 None。
+    """
+    if not token:
+        return None
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def seconds_until_expiry(token):
+    """
+    返回令牌距离过期还有多少秒；无法得知时返回 None。
+    """
+    exp = token_expiry(token)
+    return None if exp is None else exp - time.time()
+
+
+class RefreshCoordinator:
+    """
+    单飞（single-flight）令牌刷新协调器。
+
+    多个线程同时收到 401 时，只有第一个线程真正调用 refresh_access_token()，
+    其他线程在条件变量上等待它的结果，然后直接用新令牌重试，不会重复发起 /refresh 请求。
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight = False
+        self._last_result = None
+
+    def refresh(self, processor, stale_token):
+        """
+        刷新令牌，返回刷新结果。
+        :param processor: 提供 access_token 和 refresh_access_token() 的处理器
+        :param stale_token: 调用方收到 401 时使用的令牌
+        """
+        with self._condition:
+            # 调用方开始等待前，令牌已经被其他线程换掉：直接用新令牌重试
+            if processor.access_token and processor.access_token != stale_token:
+                return {"success": True, "status": 200}
+
+            if self._in_flight:
+                while self._in_flight:
+                    self._condition.wait()
+                return self._last_result
+
+            self._in_flight = True
+
+        result = None
+        try:
+            result = processor.refresh_access_token()
+            return result
+        finally:
+            with self._condition:
+                self._last_result = result or {"success": False, "status": 0}
+                self._in_flight = False
+                self._condition.notify_all()
+
+
 def with_refresh_token_retry(method_name):
     """
     装饰器工厂，创建一个装饰器，用于自动处理访问令牌过期后刷新令牌并重试调用的方法。
@@ -15,7 +85,11 @@ def with_refresh_token_retry(method_name):
         def wrapper(self, *args, **kwargs):
             """
             包装函数，先调用目标函数，如果返回401（未授权），则尝试刷新令牌并重试。
+            同一时间只会有一个刷新请求，其他收到 401 的线程等待并共享它的结果。
             """
+            # 记录本次调用使用的令牌，用来判断之后是否已被其他线程刷新
+            used_token = self.access_token
+
             # 调用目标方法
             result = func(self, *args, **kwargs)
 
@@ -23,8 +97,8 @@ def with_refresh_token_retry(method_name):
             if isinstance(result, dict) and result.get("status") == 401:
                 # print(f"[{method_name}] Token 已过期。正在尝试刷新...")
 
-                # 尝试刷新访问令牌
-                refresh_result = self.refresh_access_token()
+                # 尝试刷新访问令牌（与其他线程共享同一次刷新）
+                refresh_result = self.refresh_coordinator.refresh(self, used_token)
 
                 # 刷新成功，重新调用目标方法
                 if refresh_result.get("success"):
@@ -0,0 +1,226 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from event_emitter import EventEmitter
+from pages.utils import generate_product_map, generate_aliases
+from processors.catalog_store import CatalogStore
+from processors.matcher import build_alias_frame
+
+LEGACY_CACHE_FILE = "cache.json"  # 旧版缓存文件，仅用于首次迁移
+UNKNOWN_SKU_CACHE_SIZE = 10000    # 最多记住多少个目录中没有出现过的 SKU 写法
+
+
+class Catalog(EventEmitter):
+    """
+    常驻内存的产品目录，整个进程共享一份（通过 get_catalog() 获取）。
+
+    数据保存在 CatalogStore（SQLite）中。首次使用时读取全部产品，预先生成 SKU→产品映射，
+    并把所有已知 SKU 的别名展开一次，得到 别名→最佳产品 的索引（价格最高者胜出）；
+    之后只有当缓存文件的修改时间或大小发生变化，或显式调用 reload() 时才会重新加载。
+    """
+
+    def __init__(self, store=None, legacy_path=LEGACY_CACHE_FILE):
+        super().__init__()
+        self.store = store or CatalogStore()
+        self.legacy_path = legacy_path
+        self._lock = threading.RLock()
+        self._signature = None    # 上次加载时文件的 (mtime, size)
+        self.products = None      # 原始产品列表
+        self.product_map = {}     # SKU → 产品
+        self.alias_index = {}     # SKU（含别名写法）→ 最佳产品，无匹配时为 None
+        self._unknown = OrderedDict()  # 目录之外的 SKU 写法 → 最佳产品（有上限的 LRU）
+        self._alias_frame = None  # alias_index 的 DataFrame 形式，按需生成
+        self.version = 0          # 每次重新加载后递增
+        self._writer = None       # 后台写入线程，首次 write_async 时创建
+
+    def _file_signature(self):
+        """
+        返回缓存文件的 (mtime, size)，文件不存在时返回 None。
+        """
+        try:
+            stat = os.stat(self.store.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def fingerprint(self):
+        """
+        当前目录文件的标识（修改时间和大小），目录重新写入后会随之改变，可用作缓存版本。
+        """
+        signature = self._file_signature()
+        return "none" if signature is None else f"{signature[0]}-{signature[1]}"
+
+    def _build(self, products, signature):
+        """
+        根据产品列表重建所有索引。
+        """
+        self.products = products
+        self.product_map = generate_product_map(products)
+        self.alias_index = self._build_alias_index(products, self.product_map)
+        self._unknown.clear()
+        self._alias_frame = None
+        self._signature = signature
+        self.version += 1
+
+    def ensure_loaded(self):
+        """
+        确保目录已加载且与磁盘上的文件一致。
+        返回产品列表；缓存文件不存在时返回 None。
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if signature is None and os.path.exists(self.legacy_path):
+                # 只有旧的 cache.json：导入到新格式
+                self.store.import_json(self.legacy_path)
+                signature = self._file_signature()
+
+            if signature is None:
+                # 文件被删除：丢弃内存中的旧数据
+                if self.products is not None:
+                    self._build([], None)
+                    self.products = None
+                return None
+
+            if signature != self._signature:
+                self._build(self.store.products(), signature)
+
+            return self.products
+
+    def reload(self, products=None):
+        """
+        强制重新加载目录。
+        如果传入 products（例如刚写入缓存文件的数据），则直接使用，无需再次解析文件。
+        """
+        with self._lock:
+            if products is None:
+                self._signature = None
+                self.ensure_loaded()
+            else:
+                self._build(products, self._file_signature())
+        self.emit("catalog_updated", self.version)
+
+    def write(self, products):
+        """
+        把新的产品列表写入存储，并直接用它刷新内存中的目录。
+        """
+        self.store.write(products)
+        self.reload(products)
+
+    def write_async(self, products):
+        """
+        在后台写入线程中保存产品列表，不阻塞调用方（通常是 Tk 主线程）。
+        写入完成后发出 "catalog_updated" 事件，失败时发出 "error" 事件。
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = CatalogWriter(self)
+                self._writer.start()
+        self._writer.submit(products)
+
+    @staticmethod
+    def _resolve(sku, product_map):
+        """
+        展开 SKU 的别名，返回其中价格最高的产品；都没有匹配（或价格为 0）时返回 None。
+        价格相同时保留先出现的别名对应的产品。
+        """
+        matched_price = 0
+        matched_product = None
+        for alias in generate_aliases(sku):
+            product = product_map.get(alias)
+            if product:
+                price = product.get("price") or 0
+                if price > matched_price:
+                    matched_price = price
+                    matched_product = product
+        return matched_product
+
+    @classmethod
+    def _build_alias_index(cls, products, product_map):
+        """
+        为目录中出现过的每个 SKU 写法（产品的 sku 字段以及 skus 列表）预先计算最佳产品。
+        """
+        index = {}
+        for product in products:
+            for sku in (product.get("sku"), *product.get("skus", [])):
+                if sku and sku not in index:
+                    index[sku] = cls._resolve(sku, product_map)
+        return index
+
+    def alias_frame(self):
+        """
+        返回别名索引的 DataFrame 形式（供批量匹配使用），每次加载后只生成一次。
+        """
+        with self._lock:
+            if self._alias_frame is None:
+                self._alias_frame = build_alias_frame(self.alias_index)
+            return self._alias_frame
+
+    def lookup(self, sku):
+        """
+        返回 SKU 对应的最佳产品（一次哈希查找）。
+        目录中没有出现过的写法会在第一次查询时展开，结果保存在单独的 LRU 中（最多 UNKNOWN_SKU_CACHE_SIZE 个），
+        不写入共享的 alias_index。
+        """
+        try:
+            return self.alias_index[sku]
+        except KeyError:
+            pass
+
+        with self._lock:
+            try:
+                self._unknown.move_to_end(sku)
+                return self._unknown[sku]
+            except KeyError:
+                product = self._resolve(sku, self.product_map)
+                self._unknown[sku] = product
+                if len(self._unknown) > UNKNOWN_SKU_CACHE_SIZE:
+                    self._unknown.popitem(last=False)
+                return product
+
+
+class CatalogWriter(threading.Thread):
+    """
+    目录的后台写入线程。
+
+    写入请求排队依次处理；如果队列中积压了多份数据，只保存最新的一份。
+    """
+
+    def __init__(self, catalog):
+        super().__init__(daemon=True)
+        self.catalog = catalog
+        self._queue = queue.Queue()
+
+    def submit(self, products):
+        self._queue.put(products)
+
+    def run(self):
+        while True:
+            products = self._queue.get()
+
+            # 丢弃已经过时的数据，只写最新的一份
+            while True:
+                try:
+                    products = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                self.catalog.write(products)
+            except Exception as e:
+                self.catalog.emit("error", {"success": False, "error": f"保存缓存失败: {e}"})
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """
+    返回进程内共享的 Catalog 实例（懒加载）。
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = Catalog()
+        return _catalog
@@ -0,0 +1,155 @@
+import os
+import json
+import sqlite3
+import tempfile
+
+CATALOG_DB = "cache.db"
+
+# 产品表只保存固定字段，其他未知字段序列化到 extra 中，保证导出时不丢数据
+PRODUCT_FIELDS = ("name", "price", "quantity", "sku", "stock")
+
+# 字段列不声明类型（没有类型亲和性），值按写入时的类型原样保存：
+# 12.0 不会变成 12，"007" 不会变成 7，123 也不会变成 "123"，export_json 可以还原原来的 cache.json
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name,
+    price,
+    quantity,
+    sku,
+    stock,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS product_skus (
+    sku NOT NULL,
+    product_id INTEGER NOT NULL REFERENCES products(id)
+);
+"""
+
+
+class CatalogStore:
+    """
+    基于 SQLite 的紧凑产品目录存储，用来替代带缩进的 cache.json。
+
+    - 每个产品一行，不再重复保存键名和空白。
+    - 产品的 SKU 列表单独存成一张表，读取时按原顺序还原。
+    - 提供 import_json / export_json，与旧的 cache.json 格式互相转换。
+    """
+
+    def __init__(self, path=CATALOG_DB):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _connect(self, path=None):
+        conn = sqlite3.connect(path or self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def _row_to_product(row, skus):
+        """
+        把数据库行还原为与 cache.json 中相同结构的产品字典。
+        """
+        _, name, price, quantity, sku, stock, extra = row
+        product = {
+            "name": name,
+            "price": price,
+            "quantity": quantity,
+            "sku": sku,
+            "skus": skus,
+            "stock": stock,
+        }
+        if extra:
+            product.update(json.loads(extra))
+        return product
+
+    def write(self, products):
+        """
+        用新的产品列表整体替换目录。
+
+        记录以流的方式写入同目录下的临时文件，提交并 fsync 后再原子地重命名为目标文件，
+        写入过程中崩溃不会损坏已有的缓存。
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".catalog-", suffix=".tmp", dir=directory)
+        os.close(fd)
+
+        try:
+            conn = self._connect(tmp_path)
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        self._product_rows(products),
+                    )
+                    conn.executemany(
+                        "INSERT INTO product_skus VALUES (?, ?)",
+                        (
+                            (sku, product_id)
+                            for product_id, product in enumerate(products, start=1)
+                            for sku in product.get("skus", [])
+                        ),
+                    )
+            finally:
+                conn.close()
+
+            with open(tmp_path, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _product_rows(products):
+        """
+        逐个生成 products 表的行，未知字段放入 extra。
+        """
+        for product_id, product in enumerate(products, start=1):
+            extra = {
+                k: v for k, v in product.items()
+                if k not in PRODUCT_FIELDS and k != "skus"
+            }
+            yield (
+                product_id,
+                *(product.get(k) for k in PRODUCT_FIELDS),
+                json.dumps(extra, ensure_ascii=False) if extra else None,
+            )
+
+    def products(self):
+        """
+        按原始顺序读取所有产品。
+        """
+        conn = self._connect()
+        try:
+            skus = {}
+            for sku, product_id in conn.execute(
+                "SELECT sku, product_id FROM product_skus ORDER BY rowid"
+            ):
+                skus.setdefault(product_id, []).append(sku)
+
+            return [
+                self._row_to_product(row, skus.get(row[0], []))
+                for row in conn.execute("SELECT * FROM products ORDER BY id")
+            ]
+        finally:
+            conn.close()
+
+    def import_json(self, json_path):
+        """
+        从旧格式的 cache.json 导入目录，返回导入的产品列表。
+        """
+        with open(json_path, encoding="utf-8") as f:
+            products = json.load(f)
+        self.write(products)
+        return products
+
+    def export_json(self, json_path):
+        """
+        导出为与旧 cache.json 相同格式的 JSON 文件。
+        """
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.products(), f, ensure_ascii=False, indent=4)
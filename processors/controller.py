@@ -1,46 +1,116 @@
 from event_emitter import EventEmitter
-import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (PROCESS_CHUNK_SIZE, PROCESS_CONCURRENCY,
+                    CONTROLLER_WORKERS, CONTROLLER_MAX_QUEUE, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX)
+from processors.catalog import get_catalog
+from processors.result_cache import ProcessResultCache
+from processors.outbox import Outbox
+from processors.profile_cache import ProfileCache
+from processors.transport import CancelToken
+from processors.executor import (PriorityExecutor, QueueFullError,
+                                 PRIORITY_LOGIN, PRIORITY_INTERACTIVE, PRIORITY_BULK)
 import functools
+import random
+import threading
+import time
+
+# 之前运行遗留的发件箱任务没有对应的页面，只重放不影响全局状态的操作：
+# process 的结果只写入结果缓存；create_cache 会用可能早已过时的文件替换当前目录，直接丢弃
+REPLAY_WITHOUT_PAGE = frozenset({"process"})
 
-def run_in_thread(func):
+def run_in_pool(priority, supersede=False, finished_event=None):
     """
-    装饰器：将被装饰的方法放到一个后台守护线程中运行，避免阻塞主线程。
+    装饰器工厂：把被装饰的方法提交到控制器的优先级线程池（self.executor）中运行，避免阻塞主线程。
 
-    当被装饰函数执行出错时，尝试通过 self.emit 发出 "error" 事件，否则打印错误。
+    任务以最后一个参数（page_id）作为标签。队列已满或执行出错时，通过 self.emit 发出 "error" 事件。
+    finished_event 为方法结束时总会发出的事件（例如 "upload_finished"）：任务被拒绝、没有运行时也照样发出，
+    调用方据此关闭为该任务打开的界面（例如上传进度窗口）。
+    页面已关闭时不再提交任务；排队中的任务在开始前也会再检查一次。
+    supersede 为 True 时，同一页面的同一操作只保留最新的请求：旧的排队任务被取消，
+    正在执行的旧任务之后发出的事件全部被丢弃。
     """
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        def thread_target():
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            page_id = kwargs.get("page_id", args[-1] if args else None)
+            if self.is_closed(page_id):
+                return None
+            request = self._supersede(func.__name__, page_id) if supersede else None
+
+            def target():
+                if self.is_closed(page_id):
+                    return
+                self._local.request = request
+                self._local.page_id = page_id
+                try:
+                    func(self, *args, **kwargs)
+                except Exception as e:
+                    self.emit("error", {"page_id": page_id, "success": False, "error": str(e)})
+                finally:
+                    self._local.request = None
+                    self._local.page_id = None
+
             try:
-                func(self, *args, **kwargs)
-            except Exception as e:
-                if hasattr(self, 'emit'):
-                    self.emit("error", str(e))
-                else:
-                    print(f"线程错误: {e}")
-        threading.Thread(target=thread_target, daemon=True).start()
-    return wrapper
+                return self.executor.submit(target, priority=priority, tag=page_id, name=func.__name__)
+            except QueueFullError:
+                self.emit("error", {"page_id": page_id, "success": False, "error": "请求过多，请稍后再试。"})
+                if finished_event is not None:
+                    self.emit(finished_event, {"page_id": page_id})
+        return wrapper
+    return decorator
 
 
 class TextController(EventEmitter):
     """
     文本处理控制器，继承自 EventEmitter，支持事件监听。
 
-    通过多线程异步调用 processor 的方法，执行登录、获取用户资料、发送请求、处理文本、创建缓存等操作，
-    并通过事件通知调用方结果或错误。
+    通过有上限的优先级线程池异步调用 processor 的方法，执行登录、获取用户资料、发送请求、处理文本、创建缓存等操作，
+    并通过事件通知调用方结果或错误。登录优先级最高，交互请求其次，批量的创建缓存最低。
+    页面（标签页）关闭后调用 cancel_page()：中止该页面正在进行的 HTTP 请求、丢弃排队的任务，且不再发出该页面的事件。
+    process / create_cache 因无法连接服务器而失败时，请求存入离线发件箱并发出 "queued_offline" 事件；
+    服务器恢复后调用 replay_outbox() 按顺序重放，结果照常发给原来的页面。
     """
 
-    def __init__(self, processor):
+    def __init__(self, processor, chunk_size=PROCESS_CHUNK_SIZE,
+                 concurrency=PROCESS_CONCURRENCY, result_cache=None,
+                 workers=CONTROLLER_WORKERS, max_queue=CONTROLLER_MAX_QUEUE, outbox=None,
+                 retry_base=OUTBOX_RETRY_BASE, retry_max=OUTBOX_RETRY_MAX, profile_cache=None):
         """
         初始化方法，传入处理器实例。
+        chunk_size / concurrency 控制 /process 的分块大小和并发数（失败重试由 Transport 负责）；
+        result_cache 为 /process 结果的本地缓存，默认创建一个 ProcessResultCache；
+        workers / max_queue 为控制器线程池的线程数和最大排队任务数；
+        outbox 为离线发件箱，默认创建一个 Outbox，retry_base / retry_max 为重放失败后退避的初始和最大秒数；
+        profile_cache 为用户资料的本地缓存，默认创建一个 ProfileCache。
         """
         super().__init__()
         self.processor = processor
+        self.executor = PriorityExecutor(max_workers=workers, max_queue=max_queue, name="controller")
+        self._generations = {}                # (操作, page_id) → 最新请求的序号
+        self._generations_lock = threading.Lock()
+        self._local = threading.local()       # 当前工作线程正在执行的请求及其 page_id
+        self._cancel_tokens = {}              # page_id → CancelToken
+        self._closed_pages = set()            # 已关闭的 page_id（page_id 不会重复使用）
+        self._uploads = {}                    # page_id → 正在进行的上传的 CancelToken
+        self._pages_lock = threading.Lock()
+        self.result_cache = result_cache if result_cache is not None else ProcessResultCache()
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.outbox = outbox if outbox is not None else Outbox()
+        self.profile_cache = profile_cache if profile_cache is not None else ProfileCache()
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._replaying = False
+        self._replay_lock = threading.Lock()
+        self._queued_generations = {}         # (操作, page_id) → 存入发件箱的请求的序号
+        # 分块请求共用的线程池（底层共享同一个 HTTP 连接池）
+        self._chunk_pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="process-chunk")
 
-    @run_in_thread
+    @run_in_pool(PRIORITY_LOGIN)
     def login(self, input, page_id):
         """
         异步登录方法，使用 processor.login，完成后发出 "login_success" 或 "error" 事件。
+        登录成功后立即开始获取用户资料和预热（见 _after_login），不必等界面重建完主页。
         """
         email = input.get("email")
         password = input.get("password")
@@ -49,28 +119,66 @@ class TextController(EventEmitter):
 
         if result.get("success"):
             self.emit("login_success", result)
+            self._after_login(page_id)
         else:
             self.emit("error", result)
 
-    @run_in_thread
+    def _after_login(self, page_id):
+        """
+        拿到令牌后并行开始三项工作：获取用户资料、加载产品目录并建立别名索引、
+        预先建立 /process 分块并发所需的 HTTP 连接。界面显示主页时它们已经在进行或已完成。
+        预热任务以最低优先级提交，不会挡住用户的请求；队列已满时直接跳过。
+        """
+        self.fetch_profile(page_id)
+        for job in (self._warm_catalog, self._warm_connections):
+            try:
+                self.executor.submit(job, priority=PRIORITY_BULK, name=job.__name__)
+            except QueueFullError:
+                pass
+
+    def _warm_catalog(self):
+        try:
+            if get_catalog().ensure_loaded() is not None:
+                get_catalog().alias_frame()
+        except Exception:
+            pass  # 只是预热：出错时第一次匹配会重新加载并报告错误
+
+    def _warm_connections(self):
+        self.processor.transport.warm_up(self.concurrency)
+
+    @run_in_pool(PRIORITY_INTERACTIVE)
     def fetch_profile(self, page_id):
         """
         异步获取用户资料，完成后发出 "profile_fetched" 或 "error" 事件。
+
+        先查本地资料缓存：有缓存时立即发出 "profile_fetched"（cached 为 True）；缓存仍然新鲜时不再请求服务器，
+        已过期时在后台重新获取，只有资料发生变化时才再次发出 "profile_fetched"。
+        已经显示了缓存的资料时，重新获取失败只在会话过期（401）时发出 "error" 事件。
         """
+        email = self.processor.user_email
+        cached, fresh = self.profile_cache.get(email) if email else (None, False)
+        if cached is not None:
+            self.emit("profile_fetched", {"success": True, "profile": cached, "status": 200,
+                                          "page_id": page_id, "cached": True})
+            if fresh:
+                return
+
         result = self.processor.fetch_profile()
         result["page_id"] = page_id
 
         if result.get("success"):
-            self.emit("profile_fetched", result)
-        else:
+            changed = self.profile_cache.put(email, result["profile"]) if email else True
+            if cached is None or changed:
+                self.emit("profile_fetched", result)
+        elif cached is None or result.get("status") == 401:
             self.emit("error", result)
 
-    @run_in_thread
+    @run_in_pool(PRIORITY_INTERACTIVE)
     def send_request(self, endpoint, page_id):
         """
         异步发送请求，完成后发出 "action_success" 或 "error" 事件。
         """
-        result = self.processor.send_request(endpoint)
+        result = self.processor.send_request(endpoint, cancel_token=self.cancel_token(page_id))
         result["page_id"] = page_id
 
         if result.get("success"):
@@ -78,11 +186,205 @@ class TextController(EventEmitter):
         else:
             self.emit("error", result)
 
-    @run_in_thread
+    def _supersede(self, operation, page_id):
+        """
+        登记一个新请求：序号加一，并取消同一页面同一操作还在排队的旧任务。
+        返回 (操作, page_id, 序号)。
+        """
+        with self._generations_lock:
+            generation = self._generations.get((operation, page_id), 0) + 1
+            self._generations[(operation, page_id)] = generation
+
+        self.executor.cancel_where(lambda job: job.tag == page_id and job.name == operation)
+        return (operation, page_id, generation)
+
+    def is_stale(self):
+        """
+        当前线程执行的请求是否已被同一页面的更新请求取代。
+        """
+        request = getattr(self._local, "request", None)
+        if request is None:
+            return False
+        operation, page_id, generation = request
+        with self._generations_lock:
+            return self._generations.get((operation, page_id)) != generation
+
+    def emit(self, event, *args, **kwargs):
+        # 已被取代的请求、已关闭页面的请求不再向界面发送任何结果或错误
+        if self.is_stale() or self.is_closed(getattr(self._local, "page_id", None)):
+            return
+        # 重放之前运行遗留的任务时没有对应的页面，结果和错误都不发给界面
+        if getattr(self._local, "replaying", False) and self._local.page_id is None:
+            return
+        super().emit(event, *args, **kwargs)
+
+    def cancel_token(self, page_id):
+        """
+        返回页面的 CancelToken（页面的所有请求共用一个）。
+        """
+        with self._pages_lock:
+            token = self._cancel_tokens.get(page_id)
+            if token is None:
+                token = self._cancel_tokens[page_id] = CancelToken()
+                if page_id in self._closed_pages:
+                    token.cancel()
+            return token
+
+    def is_closed(self, page_id):
+        """
+        页面是否已经关闭。
+        """
+        return page_id is not None and page_id in self._closed_pages
+
+    def cancel_page(self, page_id):
+        """
+        页面关闭时调用：丢弃排队的任务，中止正在进行的 HTTP 请求，之后该页面的事件全部丢弃。
+        """
+        with self._pages_lock:
+            self._closed_pages.add(page_id)
+            token = self._cancel_tokens.pop(page_id, None)
+            with self._generations_lock:
+                for key in [key for key in self._generations if key[1] == page_id]:
+                    del self._generations[key]
+                for key in [key for key in self._queued_generations if key[1] == page_id]:
+                    del self._queued_generations[key]
+
+        self.cancel_pending(page_id)
+        self.outbox.discard_page(page_id)
+        if token is not None:
+            token.cancel()
+
+    def metrics(self):
+        """
+        返回控制器线程池的队列和执行中任务等指标。
+        """
+        return self.executor.metrics()
+
+    def cancel_pending(self, page_id):
+        """
+        取消指定页面还在排队的任务，返回被取消的任务列表。
+        """
+        return self.executor.cancel_where(lambda job: job.tag == page_id)
+
+    @staticmethod
+    def _is_connection_failure(result):
+        """
+        请求是否因为无法连接服务器（或健康检查认为服务器离线）而失败。
+        """
+        return not result.get("success") and result.get("status", 0) == 0 and not result.get("cancelled")
+
+    def _queue_offline(self, operation, payload, page_id):
+        """
+        把连接失败的请求存入发件箱，并发出 "queued_offline" 事件（pending 为发件箱中的任务数）。
+        重放过程中再次失败时只做标记，由 _replay 推迟重试。
+        """
+        if getattr(self._local, "replaying", False):
+            self._local.replay_failed = True
+            return
+        request = getattr(self._local, "request", None)
+        if request is not None:
+            with self._generations_lock:
+                self._queued_generations[(operation, page_id)] = request[2]
+        pending = self.outbox.add(operation, payload, page_id)
+        self.emit("queued_offline", {"page_id": page_id, "operation": operation, "pending": pending})
+
+    def replay_outbox(self):
+        """
+        在线程池中按加入顺序重放发件箱中的任务，同一时间只有一个重放任务。
+        通常在健康检查发现服务器恢复时调用。
+        """
+        with self._replay_lock:
+            if self._replaying or not len(self.outbox):
+                return
+            self._replaying = True
+        try:
+            self.executor.submit(self._replay, priority=PRIORITY_BULK, name="replay_outbox")
+        except QueueFullError:
+            with self._replay_lock:
+                self._replaying = False
+            self._schedule_replay(self.retry_base)
+
+    def _schedule_replay(self, delay):
+        timer = threading.Timer(delay, self.replay_outbox)
+        timer.daemon = True
+        timer.start()
+
+    def _replay(self):
+        """
+        依次执行发件箱中的任务。任务再次因为连接失败而失败时按指数退避推迟，并停止重放后面的任务以保持顺序。
+        - 页面已关闭，或同一页面之后又发出过同一操作的新请求（任务已被取代）时，丢弃任务。
+          重放期间页面发出新请求时，重放任务的结果同样被丢弃，不会覆盖更新的结果。
+        - 之前运行遗留的任务没有对应的页面：只有 REPLAY_WITHOUT_PAGE 中的操作以 page_id 为 None 执行，
+          不向界面发出任何事件；其他操作直接丢弃。
+        """
+        try:
+            for job in self.outbox.pending():
+                current = job.session == self.outbox.session
+                page_id = job.page_id if current else None
+                if current:
+                    with self._generations_lock:
+                        generation = self._queued_generations.get((job.operation, page_id))
+                    request = None if generation is None else (job.operation, page_id, generation)
+                else:
+                    request = None
+                self._local.request = request
+                try:
+                    obsolete = self.is_closed(page_id) or self.is_stale() or (
+                        not current and job.operation not in REPLAY_WITHOUT_PAGE
+                    )
+                finally:
+                    self._local.request = None
+                if obsolete:
+                    self.outbox.remove(job.id)
+                    continue
+
+                wait = job.next_attempt - time.time()
+                if wait > 0:
+                    self._schedule_replay(wait)
+                    return
+
+                # 直接调用被 run_in_pool 包装的原始方法，在当前线程中同步执行
+                handler = getattr(type(self), job.operation).__wrapped__
+                self._local.replaying = True
+                self._local.replay_failed = False
+                self._local.request = request
+                self._local.page_id = page_id
+                try:
+                    handler(self, **job.payload, page_id=page_id)
+                except Exception as e:
+                    self.emit("error", {"page_id": page_id, "success": False, "error": str(e)})
+                finally:
+                    self._local.replaying = False
+                    self._local.request = None
+                    self._local.page_id = None
+
+                if self._local.replay_failed:
+                    delay = min(self.retry_base * 2 ** job.attempts, self.retry_max) * random.uniform(0.8, 1.2)
+                    self.outbox.defer(job.id, delay)
+                    self._schedule_replay(delay)
+                    return
+                self.outbox.remove(job.id)
+        finally:
+            with self._replay_lock:
+                self._replaying = False
+
+    def _process_chunk(self, lines, cancel_token=None):
+        """
+        处理一个分块。连接失败和 502/503/504 由 Transport 按重试策略重试。
+        """
+        return self.processor.process(lines, cancel_token=cancel_token)
+
+    @run_in_pool(PRIORITY_INTERACTIVE, supersede=True)
     def process(self, text, page_id):
         """
-        异步处理文本，先验证文本非空，拆分成行，调用 processor.process。
-        完成后发出 "text_processed" 或 "error" 事件。
+        异步处理文本，先验证文本非空，拆分成行。
+        先查询本地结果缓存，只把未命中的行（去重后）按 chunk_size 分块，并发调用 processor.process。
+
+        分块发送时，结果按原始顺序依次发出 "text_partial" 事件（results 为新就绪的连续结果，
+        offset 为其在全部行中的位置）；全部完成后发出 "text_processed" 事件
+        （results 为按顺序合并后的全部结果，cache_stats 为缓存统计），任一块失败则发出 "error" 事件。
+        分块和缓存依赖服务器为每一行返回一条结果；某一块的结果数量与行数不同时，
+        改为不分块、不使用缓存地发送全部行，"text_processed" 的 results 为服务器原样返回的结果。
         """
         if not text or not text.strip():
             self.emit("error", {
@@ -93,23 +395,143 @@ class TextController(EventEmitter):
             return
 
         lines = text.strip().splitlines()
-        result = self.processor.process(lines)
-        result["page_id"] = page_id
+        version = get_catalog().fingerprint()
+        keys, results = self.result_cache.get_many(lines, version)
 
-        if result.get("success"):
-            self.emit("text_processed", result)
-        else:
-            self.emit("error", result)
+        # 未命中的行按键去重，每个不同的行只发送一次
+        pending = {}
+        for index, key in enumerate(keys):
+            if results[index] is None:
+                pending.setdefault(key, (lines[index], []))[1].append(index)
+
+        pending_keys = list(pending)
+        chunks = [pending_keys[i:i + self.chunk_size] for i in range(0, len(pending_keys), self.chunk_size)]
+        streamed = len(chunks) > 1
+        cancel_token = self.cancel_token(page_id)
+        futures = [
+            self._chunk_pool.submit(self._process_chunk, [pending[key][0] for key in chunk], cancel_token)
+            for chunk in chunks
+        ]
+
+        emitted = 0  # 已经通过 text_partial 发出的结果数
+        for index, (chunk, future) in enumerate(zip(chunks, futures)):
+            if self.is_stale() or cancel_token.cancelled:
+                # 已有更新的请求或页面已关闭：不再发送剩余的分块
+                for rest in futures[index:]:
+                    rest.cancel()
+                return
+
+            result = future.result()
+            if cancel_token.cancelled:
+                for rest in futures[index + 1:]:
+                    rest.cancel()
+                return
+            chunk_results = result.get("results") if result.get("success") else None
+            if chunk_results is not None and len(chunk_results) != len(chunk):
+                # 结果无法与行一一对应（例如服务器合并或跳过了某些行）：放弃分块和缓存，
+                # 把全部行作为一个请求发送（与不分块时相同），结果原样返回
+                for rest in futures[index + 1:]:
+                    rest.cancel()
+                if not (len(chunks) == 1 and len(chunk) == len(lines)):
+                    result = self._process_chunk(lines, cancel_token)
+                    if self.is_stale() or cancel_token.cancelled:
+                        return
+                if result.get("success"):
+                    result["page_id"] = page_id
+                    self.emit("text_processed", result)
+                    return
+                chunk_results = None
+
+            if chunk_results is None:
+                for rest in futures[index + 1:]:
+                    rest.cancel()
+                if self._is_connection_failure(result):
+                    # 已完成的分块已经写入结果缓存，重放时只会发送剩下的行
+                    self._queue_offline("process", {"text": text}, page_id)
+                    return
+                result["page_id"] = page_id
+                self.emit("error", result)
+                return
+
+            self.result_cache.put_many(zip(chunk, chunk_results), version)
+            for key, value in zip(chunk, chunk_results):
+                for position in pending[key][1]:
+                    results[position] = value
+
+            if streamed:
+                # 发出从上次位置开始已经连续就绪的结果
+                ready = emitted
+                while ready < len(results) and results[ready] is not None:
+                    ready += 1
+                if ready > emitted:
+                    self.emit("text_partial", {
+                        "page_id": page_id,
+                        "results": results[emitted:ready],
+                        "offset": emitted,
+                        "chunk": index,
+                        "total_chunks": len(chunks),
+                    })
+                    emitted = ready
+
+        self.emit("text_processed", {
+            "success": True,
+            "results": results,
+            "status": 200,
+            "page_id": page_id,
+            "streamed": streamed,
+            "cache_stats": self.result_cache.stats(),
+        })
 
-    @run_in_thread
+    def cancel_upload(self, page_id):
+        """
+        取消页面正在进行的上传（只影响上传，不影响该页面的其他请求）。
+        """
+        with self._pages_lock:
+            token = self._uploads.get(page_id)
+        if token is not None:
+            token.cancel()
+
+    @run_in_pool(PRIORITY_BULK, supersede=True, finished_event="upload_finished")
     def create_cache(self, file_path, page_id):
         """
-        异步创建缓存，完成后发出 "data_processed" 或 "error" 事件。
+        异步创建缓存，文件以流的方式上传。
+        上传过程中发出 "upload_progress" 事件（sent / total 为已发送和总字节数，进度每变化 1% 发出一次）；
+        完成后发出 "data_processed" 或 "error" 事件，被 cancel_upload() 取消时发出 "upload_cancelled" 事件，
+        最后总是发出 "upload_finished" 事件。
         """
-        result = self.processor.create_cache(file_path)
-        result["page_id"] = page_id
+        # 每次上传单独一个令牌：可以单独取消，页面关闭时也随之取消
+        token = CancelToken()
+        remove_callback = self.cancel_token(page_id).add_callback(token.cancel)
+        with self._pages_lock:
+            previous = self._uploads.get(page_id)
+            self._uploads[page_id] = token
+        if previous is not None:
+            previous.cancel()
 
-        if result.get("success"):
-            self.emit("data_processed", result)
-        else:
-            self.emit("error", result)
+        last_percent = -1
+
+        def on_progress(sent, total):
+            nonlocal last_percent
+            percent = sent * 100 // total if total else 100
+            if percent != last_percent:
+                last_percent = percent
+                self.emit("upload_progress", {"page_id": page_id, "sent": sent, "total": total})
+
+        try:
+            result = self.processor.create_cache(file_path, cancel_token=token, on_progress=on_progress)
+            result["page_id"] = page_id
+
+            if result.get("success"):
+                self.emit("data_processed", result)
+            elif result.get("cancelled"):
+                self.emit("upload_cancelled", result)
+            elif self._is_connection_failure(result):
+                self._queue_offline("create_cache", {"file_path": file_path}, page_id)
+            else:
+                self.emit("error", result)
+        finally:
+            remove_callback()
+            with self._pages_lock:
+                if self._uploads.get(page_id) is token:
+                    del self._uploads[page_id]
+            self.emit("upload_finished", {"page_id": page_id})
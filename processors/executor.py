@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import threading
+import traceback
+
+# 优先级：数值越小越先执行
+PRIORITY_LOGIN = 0        # 登录
+PRIORITY_INTERACTIVE = 1  # 交互请求：获取资料、处理文本等
+PRIORITY_BULK = 2         # 批量任务：上传 Excel 创建缓存
+
+
+class QueueFullError(Exception):
+    """
+    队列已满，任务被拒绝。
+    """
+
+
+class Job:
+    """
+    提交到 PriorityExecutor 的任务。
+    """
+
+    def __init__(self, func, args, kwargs, priority, tag=None, name=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.tag = tag            # 调用方自定义的标签，例如 page_id
+        self.name = name or getattr(func, "__name__", "job")
+        self.state = "queued"     # queued / running / done / cancelled
+
+    def __repr__(self):
+        return f"<Job {self.name} priority={self.priority} tag={self.tag} state={self.state}>"
+
+
+class PriorityExecutor:
+    """
+    有上限的优先级线程池。
+
+    - 最多 max_workers 个工作线程，按需创建，之后一直复用。
+    - 等待中的任务按优先级（相同优先级按提交顺序）执行，超过 max_queue 时拒绝新任务。
+    - 还在排队的任务可以取消；metrics() 返回队列和执行中的任务数。
+    - 任务抛出的异常打印后忽略，工作线程继续执行后面的任务。
+    """
+
+    def __init__(self, max_workers=4, max_queue=50, name="worker"):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.name = name
+
+        self._condition = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+        self._workers = []
+        self._idle = 0
+        self._active = set()
+
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def submit(self, func, *args, priority=PRIORITY_INTERACTIVE, tag=None, name=None, **kwargs):
+        """
+        提交任务，返回 Job。队列已满时抛出 QueueFullError。
+        """
+        job = Job(func, args, kwargs, priority, tag, name)
+        with self._condition:
+            if self.max_queue is not None and len(self._heap) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"任务队列已满（{self.max_queue}）。")
+
+            heapq.heappush(self._heap, (priority, next(self._counter), job))
+            if len(self._heap) > self._idle and len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._worker, daemon=True, name=f"{self.name}-{len(self._workers) + 1}"
+                )
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        return job
+
+    def cancel(self, job):
+        """
+        取消一个还在排队的任务，成功时返回 True；已经开始执行的任务无法通过这里取消。
+        """
+        return bool(self.cancel_where(lambda queued: queued is job))
+
+    def cancel_where(self, predicate):
+        """
+        取消所有满足 predicate(job) 的排队任务，返回被取消的任务列表。
+        """
+        with self._condition:
+            removed = [entry[2] for entry in self._heap if predicate(entry[2])]
+            if removed:
+                self._heap = [entry for entry in self._heap if entry[2] not in removed]
+                heapq.heapify(self._heap)
+                for job in removed:
+                    job.state = "cancelled"
+                self.cancelled += len(removed)
+            return removed
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                self._idle += 1
+                while not self._heap:
+                    self._condition.wait()
+                self._idle -= 1
+                _, _, job = heapq.heappop(self._heap)
+                job.state = "running"
+                self._active.add(job)
+
+            try:
+                job.func(*job.args, **job.kwargs)
+            except Exception:
+                # 任务自己的异常不能结束工作线程：线程数不会减少，也不会补充新的线程
+                traceback.print_exc()
+            finally:
+                with self._condition:
+                    job.state = "done"
+                    self._active.discard(job)
+                    self.completed += 1
+
+    def active_jobs(self):
+        with self._condition:
+            return list(self._active)
+
+    def metrics(self):
+        """
+        返回线程池的运行指标。
+        """
+        with self._condition:
+            queued_by_priority = {}
+            for priority, _, _ in self._heap:
+                queued_by_priority[priority] = queued_by_priority.get(priority, 0) + 1
+            return {
+                "workers": len(self._workers),
+                "active": len(self._active),
+                "queued": len(self._heap),
+                "queued_by_priority": queued_by_priority,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+            }
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+import requests
+from event_emitter import EventEmitter
+from config import HEALTH_INTERVAL, HEALTH_IDLE_INTERVAL, HEALTH_IDLE_AFTER, HEALTH_MAX_BACKOFF, HEALTH_TIMEOUT
+from processors.transport import get_transport
+
+MIN_PROBE_GAP = 1.0  # 两次 ping 之间的最短间隔（秒），避免被连续的失败请求频繁唤醒
+
+
+class HealthMonitor(EventEmitter):
+    """
+    服务器健康检查，整个进程共享一份（通过 get_health_monitor() 获取）。
+
+    一个常驻线程通过共享的 Transport（复用连接池）定期 GET /ping，维护 online 状态，
+    状态变化时发出 "status_changed" 事件（参数为 True / False）。
+    - 最近有正常请求收到了响应时，不再额外 ping。
+    - 长时间没有请求（空闲）时，改用较长的间隔。
+    - 服务器不可达时按指数退避（带随机抖动）重试，期间普通请求直接失败；
+      有请求被跳过或连接失败时立即重新检查。
+    """
+
+    def __init__(self, transport=None, interval=HEALTH_INTERVAL, idle_interval=HEALTH_IDLE_INTERVAL,
+                 idle_after=HEALTH_IDLE_AFTER, max_backoff=HEALTH_MAX_BACKOFF, timeout=HEALTH_TIMEOUT):
+        super().__init__()
+        self.transport = transport or get_transport()
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.idle_after = idle_after
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.online = None          # None 表示还没有检查过
+        self._failures = 0          # 连续失败的次数
+        self._last_activity = time.monotonic()  # 上次普通请求（非 ping）的时间
+        self._last_success = 0.0    # 上次确认服务器可达的时间
+        self._last_probe = 0.0      # 上次 ping 的时间
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.transport.on("request_succeeded", self._on_request_succeeded)
+        self.transport.on("request_failed", lambda error: self.check_now())
+        self.transport.on("request_skipped", lambda endpoint: self.check_now())
+
+    def start(self):
+        """
+        启动检查线程（重复调用无效）。
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def check_now(self):
+        """
+        唤醒检查线程，尽快重新 ping 一次。
+        """
+        self._wake.set()
+
+    def _on_request_succeeded(self, probe):
+        now = time.monotonic()
+        with self._lock:
+            if not probe:
+                self._last_activity = now
+            self._last_success = now
+        if not probe and self.online is not True:
+            self._set_online(True)
+
+    def _next_delay(self):
+        """
+        距离下一次 ping 的秒数。
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.online is None:
+                return 0
+            if self.online is False:
+                backoff = min(self.interval * 2 ** (self._failures - 1), self.max_backoff)
+                return backoff * random.uniform(0.8, 1.2)
+            idle = now - self._last_activity > self.idle_after
+            interval = self.idle_interval if idle else self.interval
+            return max(0.0, interval - (now - self._last_success))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            woken = self._wake.wait(self._next_delay())
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+
+            if not woken and self.online and self._next_delay() > 0:
+                continue  # 等待期间有请求成功，推迟 ping
+
+            gap = self._last_probe + MIN_PROBE_GAP - time.monotonic()
+            if gap > 0 and self._stopped.wait(gap):
+                return
+            self._probe()
+
+    def _probe(self):
+        self._last_probe = time.monotonic()
+        try:
+            resp = self.transport.get("/ping", auth=False, probe=True, timeout=self.timeout)
+            ok = resp.status_code < 500
+        except requests.exceptions.RequestException:
+            ok = False
+        self._set_online(ok)
+
+    def _set_online(self, ok):
+        with self._lock:
+            if ok:
+                self._failures = 0
+                self._last_success = time.monotonic()
+            else:
+                self._failures += 1
+            changed = self.online != ok
+            self.online = ok
+            self.transport.online = ok
+
+        if changed:
+            self.emit("status_changed", ok)
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_health_monitor():
+    """
+    返回进程内共享的 HealthMonitor 实例（懒加载）。
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor()
+        return _monitor
@@ -0,0 +1,50 @@
+import pandas as pd
+
+
+def build_alias_frame(alias_index):
+    """
+    把 别名→最佳产品 索引转换为 DataFrame，便于与表格列做向量化连接。
+    只保留有匹配结果的别名；价格列使用 object 类型，保持原始的整数/小数值。
+    """
+    aliases, skus, prices = [], [], []
+    for alias, product in alias_index.items():
+        if product:
+            aliases.append(alias)
+            skus.append(product.get("sku", ""))
+            prices.append(product.get("price", 0))
+
+    return pd.DataFrame({
+        "alias": pd.Series(aliases, dtype=object),
+        "matched_sku": pd.Series(skus, dtype=object),
+        "matched_price": pd.Series(prices, dtype=object),
+    })
+
+
+def match_columns(skus, catalog, mode="both"):
+    """
+    批量匹配：用一次 merge 把 SKU 列与目录的别名索引连接起来。
+
+    :param skus: 表格中的 SKU 列（任意可迭代对象）
+    :param catalog: 已加载的 Catalog 实例
+    :param mode: "sku"、"price" 或 "both"，与 MainPage.match 的含义相同
+    :return: 字典，按模式包含 "sku" 和/或 "price" 两列（列表），未匹配的项为空字符串
+    """
+    left = pd.DataFrame({"alias": pd.Series(list(skus), dtype=object)})
+    right = catalog.alias_frame()
+
+    # 目录中没有出现过的写法：逐个展开（每个不同的值只处理一次），再拼接到右表
+    unique = pd.Series(left["alias"].unique(), dtype=object)
+    unknown = unique[~unique.isin(right["alias"]) & unique.map(lambda v: isinstance(v, str))]
+    if len(unknown):
+        extra = {sku: catalog.lookup(sku) for sku in unknown}
+        right = pd.concat([right, build_alias_frame(extra)], ignore_index=True)
+
+    merged = left.merge(right, on="alias", how="left", sort=False)
+    matched = merged["matched_price"].notna()
+
+    result = {}
+    if mode in ("price", "both"):
+        result["price"] = merged["matched_price"].where(matched, "").tolist()
+    if mode in ("sku", "both"):
+        result["sku"] = merged["matched_sku"].where(matched, "").tolist()
+    return result
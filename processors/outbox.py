@@ -0,0 +1,106 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from config import OUTBOX_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    page_id INTEGER,
+    session TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class OutboxJob:
+    """
+    发件箱中的一个待发送任务。
+    """
+
+    def __init__(self, id, operation, payload, page_id, session, created_at, attempts, next_attempt):
+        self.id = id
+        self.operation = operation
+        self.payload = json.loads(payload)
+        self.page_id = page_id
+        self.session = session
+        self.created_at = created_at
+        self.attempts = attempts
+        self.next_attempt = next_attempt
+
+
+class Outbox:
+    """
+    持久化的离线发件箱（SQLite）。
+
+    服务器不可达时，process / create_cache 请求保存在这里，按加入的顺序重放；
+    程序重启后仍然保留。每个实例有自己的 session，用来区分本次运行加入的任务
+    （它们的 page_id 仍然对应打开的标签页）和之前运行遗留的任务。
+    """
+
+    def __init__(self, path=OUTBOX_FILE):
+        self.session = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def add(self, operation, payload, page_id):
+        """
+        加入一个任务，同一页面同一操作之前排队的任务被替换（只保留最新的请求）。
+        返回发件箱中的任务总数。
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE operation = ? AND page_id = ? AND session = ?",
+                (operation, page_id, self.session),
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (operation, payload, page_id, session, created_at) VALUES (?, ?, ?, ?, ?)",
+                (operation, json.dumps(payload, ensure_ascii=False), page_id, self.session, time.time()),
+            )
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def pending(self):
+        """
+        按加入顺序返回所有任务。
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, operation, payload, page_id, session, created_at, attempts, next_attempt "
+                "FROM jobs ORDER BY id"
+            ).fetchall()
+        return [OutboxJob(*row) for row in rows]
+
+    def remove(self, job_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def defer(self, job_id, delay):
+        """
+        记录一次失败，delay 秒之后再重试。
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, next_attempt = ? WHERE id = ?",
+                (time.time() + delay, job_id),
+            )
+
+    def discard_page(self, page_id):
+        """
+        丢弃本次运行中某个页面的所有任务（页面已关闭）。
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE page_id = ? AND session = ?", (page_id, self.session)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from config import PROFILE_CACHE_FILE, PROFILE_CACHE_TTL
+
+
+class ProfileCache:
+    """
+    用户资料的本地缓存（JSON 文件），按用户邮箱（不区分大小写）保存最近一次获取的资料和获取时间。
+
+    在 ttl 秒之内的资料视为新鲜，可以直接使用；过期的资料仍然返回，由调用方决定是否在后台重新获取。
+    """
+
+    def __init__(self, path=PROFILE_CACHE_FILE, ttl=PROFILE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None  # 邮箱 → {"profile": ..., "fetched_at": ...}，首次使用时读取
+
+    @staticmethod
+    def _key(email):
+        return (email or "").strip().lower()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        """
+        先写入同目录下的临时文件再原子地替换，避免写入过程中崩溃损坏缓存。
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".profile-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, email):
+        """
+        返回 (资料, 是否新鲜)；没有缓存时返回 (None, False)。
+        """
+        with self._lock:
+            entry = self._load().get(self._key(email))
+        if entry is None:
+            return None, False
+        return entry["profile"], time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, email, profile):
+        """
+        保存资料并刷新获取时间。返回资料与之前缓存的是否不同。
+        """
+        key = self._key(email)
+        with self._lock:
+            entries = self._load()
+            previous = entries.get(key)
+            entries[key] = {"profile": profile, "fetched_at": time.time()}
+            self._save()
+        return previous is None or previous["profile"] != profile
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+import requests
+from urllib3.exceptions import NewConnectionError
+from event_emitter import EventEmitter
+from config import (HTTP_RETRY_ATTEMPTS, HTTP_RETRY_BASE_DELAY, HTTP_RETRY_MAX_DELAY,
+                    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def request_never_sent(error):
+    """
+    连接阶段就失败的请求（连接超时、连接被拒绝），服务器没有收到任何数据，任何方法都可以安全重试。
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, "reason", reason)  # urllib3 的 MaxRetryError 包装了真正的原因
+    return isinstance(reason, NewConnectionError)
+
+
+class RetryPolicy:
+    """
+    重试策略：指数退避 + 全抖动（每次等待 0 ~ min(max_delay, base_delay * 2^attempt) 秒）。
+
+    - 连接阶段失败的请求总是可以重试。
+    - 已经发出的请求（读取超时、连接被重置、502/503/504）只有幂等时才重试，避免重复执行有副作用的操作。
+    """
+
+    def __init__(self, attempts=HTTP_RETRY_ATTEMPTS, base_delay=HTTP_RETRY_BASE_DELAY,
+                 max_delay=HTTP_RETRY_MAX_DELAY, statuses=RETRY_STATUSES):
+        self.attempts = attempts      # 最多重试的次数（不含第一次请求）
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+
+    def should_retry_error(self, error, idempotent, attempt):
+        if attempt >= self.attempts:
+            return False
+        return idempotent or request_never_sent(error)
+
+    def should_retry_response(self, resp, idempotent, attempt):
+        return attempt < self.attempts and idempotent and resp.status_code in self.statuses
+
+    def delay(self, attempt, resp=None):
+        """
+        第 attempt 次重试前等待的秒数；响应带有 Retry-After（秒）时至少等待该时间，但不超过 max_delay。
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
+
+
+class CircuitBreaker(EventEmitter):
+    """
+    断路器：连续 failure_threshold 次请求失败（连接失败或 5xx）后断开（open），
+    在 reset_timeout 秒内所有请求直接失败；之后进入半开（half_open），只放行一个试探请求，
+    成功则闭合（closed），失败则再次断开。状态变化时发出 "state_changed" 事件（参数为新状态）。
+    断开后 reset_timeout 秒到期时会主动进入半开并发出事件，即使期间没有新的请求，
+    监听者也可以借此发送试探请求（例如重放离线发件箱）。
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        super().__init__()
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        是否允许发送请求。半开状态下只有第一个调用者得到 True。
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                changed = self._set_state(STATE_HALF_OPEN)
+            else:
+                changed = None
+            if self._trial_in_flight:
+                allowed = False
+            else:
+                self._trial_in_flight = True
+                allowed = True
+        self._publish(changed)
+        return allowed
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            changed = self._set_state(STATE_CLOSED)
+        self._publish(changed)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            changed = None
+            if self.state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                changed = self._set_state(STATE_OPEN)
+                self._schedule_half_open(self.reset_timeout, self._opened_at)
+        self._publish(changed)
+
+    def release(self):
+        """
+        请求没有结果（例如被取消）：不计成功也不计失败，但允许下一个试探请求。
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _schedule_half_open(self, delay, opened_at):
+        timer = threading.Timer(delay, self._half_open_if_due, args=(opened_at,))
+        timer.daemon = True
+        timer.start()
+
+    def _half_open_if_due(self, opened_at):
+        with self._lock:
+            changed = None
+            # 之后又断开过一次时，由那一次的计时器负责
+            if self.state == STATE_OPEN and self._opened_at == opened_at:
+                remaining = self.reset_timeout - (time.monotonic() - opened_at)
+                if remaining > 0:
+                    self._schedule_half_open(remaining, opened_at)
+                else:
+                    changed = self._set_state(STATE_HALF_OPEN)
+        self._publish(changed)
+
+    def _set_state(self, state):
+        if self.state == state:
+            return None
+        self.state = state
+        return state
+
+    def _publish(self, state):
+        # 在锁外发出事件，监听者可以安全地再调用断路器
+        if state is not None:
+            self.emit("state_changed", state)
@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from config import PROCESS_CACHE_SIZE, PROCESS_CACHE_FILE, PROCESS_CACHE_MAX_ROWS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ProcessResultCache:
+    """
+    /process 结果的本地缓存。
+
+    以“目录版本 + 规范化后的行文本”的哈希为键，内存中保留最近使用的 max_entries 条（LRU），
+    如果提供了 path，还会写入 SQLite 文件，重启后仍然有效。
+    文件中每条结果记录其目录版本：写入新版本的结果时删除旧版本的全部结果（它们不会再被命中），
+    并且最多保留 max_rows 条，超出时删除最早写入的。
+    """
+
+    def __init__(self, max_entries=PROCESS_CACHE_SIZE, path=PROCESS_CACHE_FILE, max_rows=PROCESS_CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stored_version = None   # 文件中只保留这个版本的结果
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(results)")]
+            if columns and "version" not in columns:
+                # 旧格式的缓存文件没有版本列，无法清理：直接丢弃
+                self._conn.execute("DROP TABLE results")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0    # 命中缓存而没有发送的行的字节数
+
+    @staticmethod
+    def normalize(line):
+        """
+        规范化行文本：去掉首尾空白并把连续空白合并为一个空格。
+        """
+        return " ".join(line.split())
+
+    @classmethod
+    def make_key(cls, line, version):
+        data = f"{version}\0{cls.normalize(line)}".encode("utf-8")
+        return hashlib.sha1(data).hexdigest()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, lines, version):
+        """
+        查询多行的缓存结果。
+        :return: (keys, results)，results 与 lines 一一对应，未命中的位置为 None
+        """
+        keys = [self.make_key(line, version) for line in lines]
+        results = []
+
+        with self._lock:
+            for line, key in zip(lines, keys):
+                value = self._memory.get(key)
+                if value is None and self._conn is not None:
+                    row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                    if row:
+                        value = json.loads(row[0])
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.bytes_saved += len(line.encode("utf-8"))
+                results.append(value)
+
+        return keys, results
+
+    def put_many(self, items, version):
+        """
+        保存多条结果。
+        :param items: (key, result) 的可迭代对象
+        :param version: 计算这些键时使用的目录版本
+        """
+        items = list(items)
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            if self._conn is not None:
+                with self._conn:
+                    if version != self._stored_version:
+                        self._conn.execute("DELETE FROM results WHERE version != ?", (version,))
+                        self._stored_version = version
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                        ((key, version, json.dumps(value, ensure_ascii=False)) for key, value in items),
+                    )
+                    self._trim()
+
+    def _trim(self):
+        """
+        文件中的结果超过 max_rows 条时，删除最早写入的（INSERT OR REPLACE 会分配新的 rowid）。
+        """
+        excess = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_rows
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self):
+        """
+        返回命中/未命中次数和节省的上传字节数。
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self._memory),
+            }
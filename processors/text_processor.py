@@ -1,9 +1,12 @@
 import requests
-from config import API_URL
 from event_emitter import EventEmitter
 import os
+import threading
+from config import TOKEN_REFRESH_MARGIN
 from processors.validator import Validator
-from processors.auth import with_refresh_token_retry
+from processors.auth import with_refresh_token_retry, RefreshCoordinator, seconds_until_expiry
+from processors.transport import get_transport, RequestCancelled
+from processors.upload import MultipartUpload
 
 class TextProcessor(EventEmitter):
     """
@@ -11,10 +14,66 @@ class TextProcessor(EventEmitter):
     继承 EventEmitter，可发出事件（你当前代码中未见 emit，方便后续扩展）。
     """
 
-    def __init__(self):
+    def __init__(self, transport=None, refresh_margin=TOKEN_REFRESH_MARGIN):
         super().__init__()
+        self.transport = transport or get_transport()  # 共享的连接池和超时设置
         self.access_token = None      # 当前有效的访问令牌
         self.refresh_token = None     # 用于刷新访问令牌的刷新令牌
+        self.user_email = None        # 当前登录的用户邮箱（用作资料缓存的键）
+        self.refresh_coordinator = RefreshCoordinator()  # 保证同一时间只有一个刷新请求
+        self.refresh_margin = refresh_margin  # 在令牌过期前多少秒主动刷新
+        self._renewal_timer = None
+        self._renewal_lock = threading.Lock()  # 登录线程和定时器线程都会替换 _renewal_timer
+
+    @property
+    def access_token(self):
+        return self.transport.access_token
+
+    @access_token.setter
+    def access_token(self, token):
+        # 令牌保存在传输层，作为所有请求的默认授权头
+        self.transport.access_token = token
+
+    def _schedule_renewal(self):
+        """
+        根据访问令牌中的 exp，在过期前 refresh_margin 秒安排一次后台刷新，
+        让业务请求几乎不会走 401 → 刷新 → 重试 的路径。令牌没有 exp 时不安排。
+        令牌有效期不超过 refresh_margin 时，在剩余有效期过半时刷新，而不是立即刷新。
+        """
+        remaining = seconds_until_expiry(self.access_token)
+        if remaining is None:
+            self._replace_renewal_timer(None)
+            return
+
+        margin = min(self.refresh_margin, remaining / 2)
+        self._replace_renewal_timer(max(0.0, remaining - margin))
+
+    def _replace_renewal_timer(self, delay):
+        """
+        取消已安排的刷新，并在 delay 秒后安排新的一次（delay 为 None 时不安排）。
+        """
+        with self._renewal_lock:
+            if self._renewal_timer is not None:
+                self._renewal_timer.cancel()
+                self._renewal_timer = None
+            if delay is None:
+                return
+            self._renewal_timer = threading.Timer(delay, self._renew_token)
+            self._renewal_timer.daemon = True
+            self._renewal_timer.start()
+
+    def _renew_token(self):
+        """
+        定时器回调：主动刷新令牌（与 401 触发的刷新共享同一个单飞协调器）。
+        网络失败时在令牌过期前稍后重试。
+        """
+        result = self.refresh_coordinator.refresh(self, self.access_token)
+        if result.get("success") or result.get("status") != 0:
+            return
+
+        remaining = seconds_until_expiry(self.access_token)
+        if remaining is not None and remaining > 0:
+            self._replace_renewal_timer(min(30.0, remaining / 2))
 
     @staticmethod
     def _error_response(message, status):
@@ -29,11 +88,13 @@ class TextProcessor(EventEmitter):
         返回成功或失败的结果字典。
         """
         try:
-            resp = requests.post(f"{API_URL}/login", json={"email": email, "password": password})
+            resp = self.transport.post("/login", json={"email": email, "password": password}, auth=False)
             if resp.status_code == 200:
                 data = resp.json()
                 self.access_token = data["access_token"]
                 self.refresh_token = data["refresh_token"]
+                self.user_email = email
+                self._schedule_renewal()
                 return {"success": True, "status": 200}
             else:
                 # 从服务器错误响应中提取错误信息
@@ -51,10 +112,11 @@ class TextProcessor(EventEmitter):
             return self._error_response("无可用的刷新令牌。", 401)
 
         try:
-            resp = requests.post(f"{API_URL}/refresh", json={"refresh_token": self.refresh_token})
+            resp = self.transport.post("/refresh", json={"refresh_token": self.refresh_token}, auth=False)
             if resp.status_code == 200:
                 data = resp.json()
                 self.access_token = data["access_token"]
+                self._schedule_renewal()
                 return {"success": True, "status": 200}
             else:
                 return self._error_response("无法刷新令牌。", resp.status_code)
@@ -70,9 +132,8 @@ class TextProcessor(EventEmitter):
         if not self.access_token:
             return self._error_response("未认证。", 401)
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         try:
-            resp = requests.get(f"{API_URL}/profile", headers=headers)
+            resp = self.transport.get("/profile")
             if resp.status_code == 200:
                 return {"success": True, "profile": resp.json(), "status": 200}
             elif resp.status_code == 401:
@@ -83,7 +144,7 @@ class TextProcessor(EventEmitter):
             return self._error_response("无法连接到服务器。", 0)
 
     @with_refresh_token_retry("send_request")
-    def send_request(self, endpoint):
+    def send_request(self, endpoint, cancel_token=None):
         """
         发送带授权的 POST 请求到指定 API 端点。
         返回成功消息或错误信息。
@@ -91,9 +152,8 @@ class TextProcessor(EventEmitter):
         if not self.access_token:
             return self._error_response("未认证。", 401)
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         try:
-            resp = requests.post(f"{API_URL}{endpoint}", headers=headers)
+            resp = self.transport.post(endpoint, cancel_token=cancel_token)
             if resp.status_code == 200:
                 return {"success": True, "message": resp.json().get("message", "成功！"), "status": 200}
             elif resp.status_code == 403:
@@ -106,7 +166,7 @@ class TextProcessor(EventEmitter):
             return self._error_response("无法连接到服务器。", 0)
 
     @with_refresh_token_retry("process")
-    def process(self, lines):
+    def process(self, lines, cancel_token=None):
         """
         将文本行列表发送到后端进行处理。
         返回处理结果或错误。
@@ -114,9 +174,11 @@ class TextProcessor(EventEmitter):
         if not self.access_token:
             return self._error_response("未认证。", 401)
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
         try:
-            resp = requests.post(f"{API_URL}/process", json={"lines": lines}, headers=headers)
+            resp = self.transport.post(
+                "/process", json={"lines": lines}, cancel_token=cancel_token, compress=True,
+                idempotent=True,  # 处理文本没有副作用，失败后可以安全重发
+            )
             if resp.status_code == 200:
                 return {"success": True, "results": resp.json().get("results", ""), "status": 200}
             elif resp.status_code == 401:
@@ -127,11 +189,11 @@ class TextProcessor(EventEmitter):
             return self._error_response("无法连接到服务器。", 0)
 
     @with_refresh_token_retry("create_cache")
-    def create_cache(self, file_path):
+    def create_cache(self, file_path, cancel_token=None, on_progress=None):
         """
         上传 Excel 文件创建缓存数据。
-        验证文件存在、格式及必需列。
-        返回处理后的数据或错误。
+        验证文件存在、格式及必需列。文件以流的方式分块上传，on_progress(已发送字节数, 总字节数) 报告进度。
+        返回处理后的数据或错误；上传被取消时返回 cancelled 为 True 的错误。
         """
         if not self.access_token:
             return self._error_response("未认证。", 401)
@@ -146,18 +208,19 @@ class TextProcessor(EventEmitter):
         if not valid:
             return self._error_response(error_msg, 400)
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-
         try:
-            with open(file_path, 'rb') as f:
-                files = {
-                    'file': (
-                        os.path.basename(file_path),
-                        f,
-                        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                    )
-                }
-                resp = requests.post(f"{API_URL}/create-cache", files=files, headers=headers)
+            upload = MultipartUpload(
+                file_path,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                on_progress=on_progress,
+                cancel_token=cancel_token,
+            )
+            resp = self.transport.post(
+                "/create-cache",
+                data=upload,
+                headers={"Content-Type": upload.content_type},
+                cancel_token=cancel_token,
+            )
 
             if resp.status_code == 200:
                 return {"success": True, "processed_data": resp.json().get("processed_data", []), "status": 200}
@@ -170,5 +233,7 @@ class TextProcessor(EventEmitter):
                     backend_error = ""
                 return self._error_response(f"错误：{resp.status_code}。{backend_error}", resp.status_code)
 
+        except RequestCancelled:
+            return {**self._error_response("上传已取消。", 0), "cancelled": True}
         except requests.exceptions.RequestException:
             return self._error_response("无法连接到服务器。", 0)
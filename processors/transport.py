@@ -0,0 +1,385 @@
+import gzip
+import json
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+from event_emitter import EventEmitter
+from config import API_URL, HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_GZIP_MIN_SIZE
+from processors.resilience import RetryPolicy, CircuitBreaker, IDEMPOTENT_METHODS
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """
+    请求已被取消（例如所属标签页已关闭）。
+    """
+
+
+class ServerOffline(requests.exceptions.ConnectionError):
+    """
+    健康检查认为服务器当前不可达，请求未发送即失败。
+    """
+
+
+class CircuitOpen(ServerOffline):
+    """
+    断路器处于断开状态，请求未发送即失败。
+    """
+
+
+class CancelToken:
+    """
+    取消令牌：可以在任意线程调用 cancel()，正在使用该令牌的请求会尽快中止。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._event = threading.Event()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def wait(self, timeout):
+        """
+        最多等待 timeout 秒，期间被取消时立即返回。返回是否已取消。
+        """
+        return self._event.wait(timeout)
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback):
+        """
+        注册取消时执行的回调（已取消时立即执行），返回用于注销该回调的函数。
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+_sending = threading.local()  # 当前线程正在发送的请求的 CancelToken 及其注销函数
+
+
+class _CancellableConnectionMixin:
+    """
+    每次在连接上发送请求时，把“关闭套接字”注册到当前线程的 CancelToken 上：
+    请求还在等待响应头时被取消，阻塞的读取也会立即失败，而不是一直等到读取超时。
+    连接回到连接池、被其他请求复用之后，旧令牌的回调不再起作用。
+    """
+
+    _cancel_token = None
+
+    def request(self, *args, **kwargs):
+        token = getattr(_sending, "token", None)
+        self._cancel_token = token
+        if token is not None:
+            if token.cancelled:
+                raise ConnectionAbortedError("请求已取消。")
+            _sending.unregister.append(token.add_callback(lambda: self._abort(token)))
+        return super().request(*args, **kwargs)
+
+    def _abort(self, token):
+        sock = self.sock
+        if sock is not None and self._cancel_token is token:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """
+    使用可取消连接的 HTTPAdapter。
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
+
+
+class Transport(EventEmitter):
+    """
+    共享的 HTTP 传输层。
+
+    持有一个带连接池的 requests.Session（keep-alive，复用 TCP/TLS 连接），
+    为所有请求统一设置连接/读取超时，并自动附加默认的授权头。
+    响应体可以是压缩的；服务器在响应中通过 Accept-Encoding 声明支持后，较大的 JSON 请求体也以 gzip 压缩发送。
+
+    每次请求后发出 "request_succeeded"（收到了响应，参数为是否是健康检查）或 "request_failed"（连接失败或超时）事件。
+    online 由 HealthMonitor 维护：为 False 时普通请求直接抛出 ServerOffline 并发出 "request_skipped" 事件，
+    不再等待 TCP 超时。
+
+    连接失败和 502/503/504 按 retry（RetryPolicy）重试；最终失败的请求计入 breaker（CircuitBreaker），
+    断路器断开期间普通请求直接抛出 CircuitOpen。
+    """
+
+    def __init__(self, base_url=API_URL, pool_size=HTTP_POOL_SIZE,
+                 connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 gzip_min_size=HTTP_GZIP_MIN_SIZE, retry=None, breaker=None):
+        super().__init__()
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.online = None          # 服务器是否可达：None 表示未知，由 HealthMonitor 更新
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.access_token = None    # 默认的授权令牌，由 TextProcessor 维护
+        self.gzip_min_size = gzip_min_size
+        self.server_accepts_gzip = False  # 服务器是否声明接受 gzip 压缩的请求体
+
+        self.session = requests.Session()
+        # 接受压缩的响应（安装了 Brotli 时也包括 br），由 urllib3 透明解压
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = _CancellableAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, endpoint, auth=True, cancel_token=None, compress=False, probe=False,
+                idempotent=None, **kwargs):
+        """
+        发送请求到 base_url + endpoint。
+        :param auth: 是否附加 Authorization 头（登录和刷新令牌时不需要）
+        :param cancel_token: 可选的 CancelToken，取消后抛出 RequestCancelled
+        :param compress: 是否对 json 请求体做 gzip 压缩（仅在服务器声明支持且请求体足够大时生效）
+        :param probe: 是否是健康检查请求（服务器离线或断路器断开时也会发送，不重试，不计入断路器）
+        :param idempotent: 请求是否可以安全地重复发送，默认按 HTTP 方法判断（GET 等为幂等，POST 不是）
+        :param kwargs: 透传给 requests.Session.request，未指定 timeout 时使用默认超时
+        """
+        if probe:
+            return self._attempt(method, endpoint, auth, cancel_token, compress, probe, **kwargs)
+
+        if self.online is False:
+            self.emit("request_skipped", endpoint)
+            raise ServerOffline("服务器当前不可达。")
+        if not self.breaker.allow():
+            self.emit("request_skipped", endpoint)
+            raise CircuitOpen("服务器暂时不可用，请稍后再试。")
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            try:
+                resp = self._attempt(method, endpoint, auth, cancel_token, compress, probe, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not self.retry.should_retry_error(e, idempotent, attempt):
+                    self.breaker.record_failure()
+                    raise
+                if self._backoff(attempt, cancel_token):
+                    self.breaker.release()
+                    raise RequestCancelled("请求已取消。") from e
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+
+            if self.retry.should_retry_response(resp, idempotent, attempt):
+                resp.close()
+                if self._backoff(attempt, cancel_token, resp):
+                    self.breaker.release()
+                    raise RequestCancelled("请求已取消。")
+                attempt += 1
+                continue
+
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return resp
+
+    def _backoff(self, attempt, cancel_token, resp=None):
+        """
+        重试前等待。返回 True 表示等待期间请求被取消。
+        """
+        delay = self.retry.delay(attempt, resp)
+        if cancel_token is not None:
+            return cancel_token.wait(delay)
+        time.sleep(delay)
+        return False
+
+    def _attempt(self, method, endpoint, auth, cancel_token, compress, probe, **kwargs):
+        """
+        发送一次请求，并发出 "request_succeeded" / "request_failed" 事件。
+        """
+        try:
+            resp = self._request(method, endpoint, auth, cancel_token, compress, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self.emit("request_failed", e)
+            raise
+        self.emit("request_succeeded", probe)
+        return resp
+
+    def _request(self, method, endpoint, auth, cancel_token, compress, **kwargs):
+        headers = dict(kwargs.pop("headers", None) or {})
+        if auth and self.access_token:
+            headers.setdefault("Authorization", f"Bearer {self.access_token}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{endpoint}"
+
+        compressed = compress and self.server_accepts_gzip and kwargs.get("json") is not None
+        if compressed:
+            body = json.dumps(kwargs["json"], allow_nan=False).encode("utf-8")
+            compressed = len(body) >= self.gzip_min_size
+        if compressed:
+            gzip_kwargs = {k: v for k, v in kwargs.items() if k != "json"}
+            gzip_headers = {**headers, "Content-Type": "application/json", "Content-Encoding": "gzip"}
+            resp = self._send(method, url, gzip_headers, cancel_token,
+                              data=gzip.compress(body, compresslevel=6), **gzip_kwargs)
+            if resp.status_code != 415:
+                return resp
+            # 415：服务器实际上不接受压缩的请求体，之后不再压缩，并以原始格式重发
+            self.server_accepts_gzip = False
+
+        return self._send(method, url, headers, cancel_token, **kwargs)
+
+    def _note_encodings(self, resp):
+        """
+        根据响应的 Accept-Encoding 头（RFC 7694）记录服务器是否接受 gzip 压缩的请求体。
+        """
+        accepted = resp.headers.get("Accept-Encoding")
+        if accepted is not None:
+            self.server_accepts_gzip = "gzip" in accepted.lower()
+
+    def _send(self, method, url, headers, cancel_token, **kwargs):
+        if cancel_token is None:
+            resp = self.session.request(method, url, headers=headers, **kwargs)
+            self._note_encodings(resp)
+            return resp
+
+        if cancel_token.cancelled:
+            raise RequestCancelled("请求已取消。")
+
+        # 发送和等待响应头期间，取消会关闭连接的套接字（见 _CancellableConnectionMixin）；
+        # 之后以流的方式读取响应体，每读一块检查一次取消；取消时关闭连接，不再占用带宽
+        _sending.token, _sending.unregister = cancel_token, []
+        resp = None
+        try:
+            try:
+                resp = self.session.request(method, url, headers=headers, stream=True, **kwargs)
+            except requests.exceptions.RequestException as e:
+                # 请求在发送途中或等待响应时被取消，底层会把异常包装成连接错误
+                if cancel_token.cancelled:
+                    raise RequestCancelled("请求已取消。") from e
+                raise
+            self._note_encodings(resp)
+            _sending.unregister.append(cancel_token.add_callback(resp.close))
+            body = []
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                if cancel_token.cancelled:
+                    break
+                body.append(chunk)
+        except RequestCancelled:
+            raise
+        except Exception:
+            if not cancel_token.cancelled:
+                raise
+        finally:
+            for unregister in _sending.unregister:
+                unregister()
+            _sending.token, _sending.unregister = None, []
+
+        if cancel_token.cancelled:
+            if resp is not None:
+                resp.close()
+            raise RequestCancelled("请求已取消。")
+
+        resp._content = b"".join(body)  # 与 requests 读取完整响应体后的状态一致
+        return resp
+
+    def warm_up(self, connections=1, timeout=None):
+        """
+        预先建立最多 connections 个（不超过连接池大小）到服务器的连接：同时发出多个 GET /ping，
+        完成后连接留在连接池中，之后的并发请求不必再等待 TCP/TLS 握手。
+        已知服务器不可达时不发送。返回成功的 ping 数。
+        """
+        if self.online is False:
+            return 0
+        connections = max(1, min(connections, self.pool_size))
+        barrier = threading.Barrier(connections)
+        results = []
+
+        def ping():
+            try:
+                barrier.wait(timeout=self.timeout[0])  # 同时发出，每个 ping 各占一个连接
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                resp = self.get("/ping", auth=False, probe=True, timeout=timeout)
+                results.append(resp.status_code < 500)
+            except requests.exceptions.RequestException:
+                results.append(False)
+
+        threads = [threading.Thread(target=ping, name=f"warm-up-{n}", daemon=True) for n in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(results)
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """
+    返回进程内共享的 Transport 实例（懒加载）。
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
@@ -0,0 +1,56 @@
+import os
+import uuid
+from processors.transport import RequestCancelled
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class MultipartUpload:
+    """
+    以流的方式上传单个文件的 multipart/form-data 请求体。
+
+    文件按 chunk_size 分块读取并逐块发送，不会把整个请求体读入内存；
+    总长度预先计算，因此请求带有 Content-Length，而不是分块传输编码。
+    每发送一块调用一次 on_progress(已发送字节数, 总字节数)；cancel_token 被取消时中止发送。
+    对象只能迭代一次，重新发送（例如刷新令牌后重试）时需要新建实例。
+    """
+
+    def __init__(self, file_path, field="file", content_type="application/octet-stream",
+                 chunk_size=UPLOAD_CHUNK_SIZE, on_progress=None, cancel_token=None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.cancel_token = cancel_token
+
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        filename = os.path.basename(file_path).replace('"', "%22")
+        self._head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self.total = len(self._head) + os.path.getsize(file_path) + len(self._tail)
+        self.sent = 0
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        yield self._advance(self._head)
+        with open(self.file_path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield self._advance(chunk)
+        yield self._advance(self._tail)
+
+    def _advance(self, chunk):
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise RequestCancelled("上传已取消。")
+        self.sent += len(chunk)
+        if self.on_progress:
+            self.on_progress(self.sent, self.total)
+        return chunk
@@ -0,0 +1,42 @@
+import os
+import sys
+
+# 测试直接导入仓库根目录下的模块（app、processors、pages 等）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """
+    在进程内启动 mock_server（与 load_test 相同的方式），测试结束后关闭。
+    通过 server.app.config["mock.options"] 修改参数，通过 server.app.config["mock.stats"] 读取统计。
+    """
+    from load_test import MockServerThread
+    from mock_server import MockOptions
+
+    server = MockServerThread(MockOptions()).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_processor(mock_server):
+    """
+    返回一个函数：创建连接到 mock_server 的 TextProcessor（各自独立的 Transport），并登录。
+    """
+    from processors.text_processor import TextProcessor
+    from processors.transport import Transport
+
+    processors = []
+
+    def make(**transport_kwargs):
+        processor = TextProcessor(transport=Transport(base_url=mock_server.url, **transport_kwargs))
+        assert processor.login("test@example.com", "secret")["success"]
+        processors.append(processor)
+        return processor
+
+    yield make
+    for processor in processors:
+        processor._replace_renewal_timer(None)
@@ -0,0 +1,142 @@
+"""
+TextController 的任务提交：队列已满时的事件，以及发件箱的重放。
+"""
+import pytest
+
+from processors.controller import TextController
+from processors.outbox import Outbox
+from processors.profile_cache import ProfileCache
+from processors.result_cache import ProcessResultCache
+
+
+OFFLINE = {"success": False, "error": "无法连接服务器", "status": 0}
+
+
+class StubProcessor:
+    def __init__(self):
+        self.offline = False
+        self.uploads = []
+
+    def create_cache(self, file_path, cancel_token=None, on_progress=None):
+        self.uploads.append(file_path)
+        if self.offline:
+            return dict(OFFLINE)
+        return {"success": True, "processed_data": [file_path], "status": 200}
+
+    def process(self, lines, cancel_token=None):
+        if self.offline:
+            return dict(OFFLINE)
+        return {"success": True, "results": [{"text": line} for line in lines], "status": 200}
+
+
+@pytest.fixture
+def controller(tmp_path):
+    # max_queue=0：每次提交都会因为队列已满被拒绝
+    controller = TextController(
+        StubProcessor(), workers=1, max_queue=0,
+        result_cache=ProcessResultCache(path=None),
+        outbox=Outbox(str(tmp_path / "outbox.db")),
+        profile_cache=ProfileCache(str(tmp_path / "profile.json")),
+    )
+    return controller
+
+
+def record(controller, *events):
+    recorded = []
+    for event in events:
+        controller.on(event, lambda result, event=event: recorded.append((event, result.get("page_id"))))
+    return recorded
+
+
+def test_rejected_create_cache_still_emits_upload_finished(controller):
+    events = record(controller, "error", "upload_finished")
+
+    controller.create_cache("catalog.xlsx", 1)
+
+    assert events == [("error", 1), ("upload_finished", 1)]
+
+
+def test_rejected_process_emits_only_error(controller):
+    events = record(controller, "error", "upload_finished")
+
+    controller.process("SKU-1 x 1", 2)
+
+    assert events == [("error", 2)]
+
+
+def make_replay_controller(tmp_path, processor):
+    return TextController(
+        processor, workers=1,
+        result_cache=ProcessResultCache(path=None),
+        outbox=Outbox(str(tmp_path / "outbox.db")),
+        profile_cache=ProfileCache(str(tmp_path / "profile.json")),
+    )
+
+
+def run_create_cache(controller, file_path, page_id):
+    # 在当前线程中按 run_in_pool 的方式执行一次（登记新请求后调用原方法）
+    controller._local.request = controller._supersede("create_cache", page_id)
+    controller._local.page_id = page_id
+    try:
+        TextController.create_cache.__wrapped__(controller, file_path, page_id)
+    finally:
+        controller._local.request = None
+        controller._local.page_id = None
+
+
+def test_replay_drops_create_cache_from_earlier_session(tmp_path):
+    Outbox(str(tmp_path / "outbox.db")).add("create_cache", {"file_path": "old.xlsx"}, 1)
+    processor = StubProcessor()
+    controller = make_replay_controller(tmp_path, processor)
+    events = record(controller, "data_processed", "error")
+
+    controller._replay()
+
+    assert processor.uploads == []
+    assert events == []
+    assert len(controller.outbox) == 0
+
+
+def test_replay_of_earlier_session_process_emits_nothing(tmp_path):
+    Outbox(str(tmp_path / "outbox.db")).add("process", {"text": "SKU-1 x 1"}, 1)
+    controller = make_replay_controller(tmp_path, StubProcessor())
+    events = record(controller, "text_processed", "text_partial", "error")
+
+    controller._replay()
+
+    assert events == []
+    assert len(controller.outbox) == 0
+
+
+def test_replay_does_not_overwrite_newer_result(tmp_path):
+    processor = StubProcessor()
+    controller = make_replay_controller(tmp_path, processor)
+    processed = []
+    controller.on("data_processed", lambda result: processed.append(result["processed_data"]))
+
+    processor.offline = True
+    run_create_cache(controller, "old.xlsx", 1)
+    assert len(controller.outbox) == 1
+
+    processor.offline = False
+    run_create_cache(controller, "new.xlsx", 1)
+    controller._replay()
+
+    assert processed == [["new.xlsx"]]
+    assert processor.uploads == ["old.xlsx", "new.xlsx"]
+    assert len(controller.outbox) == 0
+
+
+def test_replay_runs_job_that_was_not_superseded(tmp_path):
+    processor = StubProcessor()
+    controller = make_replay_controller(tmp_path, processor)
+    processed = []
+    controller.on("data_processed", lambda result: processed.append(result["processed_data"]))
+
+    processor.offline = True
+    run_create_cache(controller, "catalog.xlsx", 1)
+    processor.offline = False
+    controller._replay()
+
+    assert processed == [["catalog.xlsx"]]
+    assert len(controller.outbox) == 0
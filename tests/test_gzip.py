@@ -0,0 +1,80 @@
+"""
+/process 的 gzip 协商：压缩的响应和请求体、415 后回退，以及慢速链路上节省的时间。
+"""
+import time
+
+
+def make_lines(count):
+    return [f"SKU-{n:05d} 测试商品 {n % 97} 规格 {n % 13} x {n % 9 + 1}" for n in range(count)]
+
+
+def stats_delta(server, before):
+    after = server.app.config["mock.stats"].snapshot()
+    return {key: after[key] - before[key] for key in ("bytes_in", "bytes_in_raw", "bytes_out", "bytes_out_raw")}
+
+
+def test_process_response_is_compressed(mock_server, make_processor):
+    mock_server.app.config["mock.options"].payload_size = 200
+    processor = make_processor()
+    stats = mock_server.app.config["mock.stats"]
+
+    before = stats.snapshot()
+    result = processor.process(make_lines(2000))
+    delta = stats_delta(mock_server, before)
+
+    assert result["success"] and len(result["results"]) == 2000
+    assert delta["bytes_out"] * 5 < delta["bytes_out_raw"]
+
+
+def test_process_request_body_is_compressed_after_negotiation(mock_server, make_processor):
+    processor = make_processor()
+    assert processor.transport.server_accepts_gzip  # 登录的响应已经声明 Accept-Encoding: gzip
+
+    before = mock_server.app.config["mock.stats"].snapshot()
+    result = processor.process(make_lines(2000))
+    delta = stats_delta(mock_server, before)
+
+    assert result["success"] and len(result["results"]) == 2000
+    assert delta["bytes_in"] * 3 < delta["bytes_in_raw"]
+
+
+def test_small_request_body_is_not_compressed(mock_server, make_processor):
+    processor = make_processor()
+
+    before = mock_server.app.config["mock.stats"].snapshot()
+    assert processor.process(["SKU-1 x 1"])["success"]
+    delta = stats_delta(mock_server, before)
+
+    assert delta["bytes_in"] == delta["bytes_in_raw"]
+
+
+def test_falls_back_to_uncompressed_body_after_415(mock_server, make_processor):
+    processor = make_processor()
+    assert processor.transport.server_accepts_gzip
+    mock_server.app.config["mock.options"].gzip_enabled = False  # 服务器不再接受压缩的请求体
+
+    result = processor.process(make_lines(500))
+
+    assert result["success"] and len(result["results"]) == 500
+    assert processor.transport.server_accepts_gzip is False
+
+
+def timed_process(processor, lines):
+    started = time.perf_counter()
+    result = processor.process(lines)
+    assert result["success"]
+    return time.perf_counter() - started
+
+
+def test_gzip_reduces_latency_on_a_slow_link(mock_server, make_processor):
+    options = mock_server.app.config["mock.options"]
+    options.payload_size = 100
+    options.bandwidth = 2 * 1024 * 1024  # 2 MB/s
+    lines = make_lines(5000)
+
+    compressed = timed_process(make_processor(), lines)
+
+    options.gzip_enabled = False
+    plain = timed_process(make_processor(), lines)
+
+    assert compressed < plain * 0.5, (compressed, plain)
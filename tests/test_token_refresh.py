@@ -0,0 +1,73 @@
+"""
+多个线程同时收到 401 时，只发出一次 /refresh，所有请求都用新令牌重试成功；
+令牌有效期短于提前刷新的时间时，主动续期仍然在过期前持续进行。
+"""
+import threading
+import time
+
+import jwt
+
+from processors.auth import seconds_until_expiry
+
+
+def forged_token():
+    # 服务器无法校验签名（返回 401），但客户端看到的 exp 还很远，不会提前续期
+    claims = {"sub": "test@example.com", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, "not-the-server-secret-but-long-enough-for-hs256", algorithm="HS256")
+
+
+def run_concurrently(count, func):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = func(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return results
+
+
+def test_concurrent_401s_share_one_refresh(mock_server, make_processor):
+    mock_server.app.config["mock.options"].latency = 0.1  # 让所有请求都在刷新完成前收到 401
+    processor = make_processor()
+    stats = mock_server.app.config["mock.stats"]
+    processor.access_token = forged_token()
+    before = stats.snapshot()["calls"]
+
+    results = run_concurrently(8, lambda index: processor.process([f"SKU-{index} x 1"]))
+
+    calls = stats.snapshot()["calls"]
+    assert all(result["success"] for result in results), results
+    assert calls.get("refresh", 0) - before.get("refresh", 0) == 1
+    assert calls["process"] - before.get("process", 0) == 16  # 每个请求：一次 401 + 一次重试
+
+
+def test_failed_refresh_reports_session_expired(mock_server, make_processor):
+    processor = make_processor()
+    processor.access_token = forged_token()
+    processor.refresh_token = "unknown-refresh-token"
+
+    results = run_concurrently(4, lambda index: processor.process([f"SKU-{index} x 1"]))
+
+    assert all(result["status"] == 401 and not result["success"] for result in results), results
+
+
+def test_short_lived_token_is_renewed_before_expiry(mock_server, make_processor):
+    mock_server.app.config["mock.options"].token_ttl = 2  # 远小于默认的 refresh_margin（60 秒）
+    stats = mock_server.app.config["mock.stats"]
+    processor = make_processor()
+    assert processor.refresh_margin > 2
+    assert stats.snapshot()["calls"].get("refresh", 0) == 0  # 登录后不会立即刷新
+
+    deadline = time.time() + 4
+    while time.time() < deadline:
+        remaining = seconds_until_expiry(processor.access_token)
+        assert remaining is not None and remaining > 0
+        time.sleep(0.1)
+
+    assert stats.snapshot()["calls"].get("refresh", 0) >= 3  # 每次续期后都会安排下一次
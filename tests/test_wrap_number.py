@@ -0,0 +1,93 @@
+"""
+find_number_span / wrap_number 与原来逐字符扫描的实现逐行比对（随机生成的行）。
+"""
+import os
+import random
+import re
+
+import pytest
+
+from pages.utils import wrap_number
+
+FUZZ_LINES = int(os.getenv("WRAP_NUMBER_FUZZ_LINES", "300000"))
+ALPHABET = "0123456789[] .,:abx-\t"
+
+
+def reference_wrap_number(text, key=None, direction="forward"):
+    """
+    优化之前的实现（原样保留，作为比对的基准）。
+    """
+    inside_brackets = False
+
+    pattern = re.compile(r"(?<![\[\d])(\d+(?:\s*[.,]\s*\d+)?)(?![\d\]])")
+
+    if direction == "forward":
+        i = 0
+        while i < len(text):
+            if text[i] == "[":
+                inside_brackets = True
+            elif text[i] == "]":
+                inside_brackets = False
+
+            if not inside_brackets:
+                match = pattern.search(text, i)
+                if match:
+                    raw_number = match.group(1)
+                    start_pos, end_pos = match.span(1)
+                    clean_number = re.sub(r"\s*", "", raw_number)
+
+                    replacement = f"[{key}:{clean_number}]" if key else f"[{clean_number}]"
+                    return text[:start_pos] + replacement + text[end_pos:]
+                break
+            i += 1
+
+    elif direction == "backward":
+        i = len(text) - 1
+        while i >= 0:
+            if text[i] == "]":
+                inside_brackets = True
+            elif text[i] == "[":
+                inside_brackets = False
+
+            if not inside_brackets:
+                matches = list(pattern.finditer(text[:i + 1]))
+                if matches:
+                    match = matches[-1]
+                    raw_number = match.group(1)
+                    start_pos, end_pos = match.span(1)
+
+                    clean_number = re.sub(r"\s*", "", raw_number)
+                    replacement = f"[{key}:{clean_number}]" if key else f"[{clean_number}]"
+                    return text[:start_pos] + replacement + text[end_pos:]
+                break
+            i -= 1
+
+    return text
+
+
+def random_line(rng):
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 24)))
+
+
+@pytest.mark.parametrize("text, direction, expected", [
+    ("abc 12 x 3", "forward", "abc [12] x 3"),
+    ("abc 12 x 3", "backward", "abc 12 x [3]"),
+    ("[k:1] abc 2,5", "forward", "[k:1] abc [2,5]"),
+    ("abc 7 [q:2]", "backward", "abc [7] [q:2]"),
+    ("1 . 5 kg", "forward", "[1.5] kg"),
+    ("[only 3]", "forward", "[only 3]"),
+    ("", "backward", ""),
+])
+def test_wrap_number_examples(text, direction, expected):
+    assert wrap_number(text, direction=direction) == expected
+    assert reference_wrap_number(text, direction=direction) == expected
+
+
+def test_wrap_number_matches_reference_on_random_lines():
+    rng = random.Random(20240606)
+    for _ in range(FUZZ_LINES):
+        text = random_line(rng)
+        for direction in ("forward", "backward"):
+            key = rng.choice((None, "k"))
+            assert wrap_number(text, key, direction) == reference_wrap_number(text, key, direction), \
+                (text, key, direction)
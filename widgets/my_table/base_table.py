@@ -131,24 +131,36 @@ class BaseTable(ttk.Frame):
         self.set_data(self.data)
         self.after(100, self.adjust_columns)
 
-    def set_data(self, new_data):
-        """设置表格数据，自动为缺失的行添加唯一 row_id"""
+    def _prepare_rows(self, rows):
+        """为缺失的行添加唯一 row_id，并用 DictProcessor 按列顺序和默认值处理数据"""
         processed_data = []
-        for row in new_data:
+        for row in rows:
             row = dict(row)
             if "row_id" not in row:
                 row["row_id"] = str(uuid.uuid4())
             processed_data.append(row)
 
-        # 用 DictProcessor 按列顺序和默认值处理数据
         processor = DictProcessor(
             order=self.columns,
             default_value=""
         )
-        self.data = processor(processed_data)
+        return processor(processed_data)
+
+    def set_data(self, new_data):
+        """设置表格数据，自动为缺失的行添加唯一 row_id"""
+        self.data = self._prepare_rows(new_data)
         self.refresh()
         self.after(100, self.adjust_columns)
 
+    def append_rows(self, new_rows):
+        """在末尾追加多行数据，只插入新行，已有的行保持不变（不重建整个表格）；返回追加的行"""
+        rows = self._prepare_rows(new_rows)
+        self.data.extend(rows)
+        for item in rows:
+            values = [item.get(col, '') for col in self.columns]
+            self.tree.insert('', 'end', iid=item.get("row_id"), values=values)
+        return rows
+
     def get_data(self):
         """获取当前数据（不包含内部管理的 row_id）"""
         return [{k: v for k, v in row.items() if k != "row_id"} for row in self.data]
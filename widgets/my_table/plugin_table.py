@@ -110,3 +110,15 @@ class PluginTable(BaseTable, EventEmitter):  # PluginTable 类继承了 BaseTabl
         
         # 触发 'data_setted' 事件，通知表格数据已设置
         self.emit("data_setted", data=data)
+
+    def append_rows(self, rows):
+        """
+        在末尾追加多行数据，并触发 'rows_appended' 事件
+        :param rows: 追加的行数据
+        """
+        # 调用父类的 append_rows 方法，只插入新行
+        appended = super().append_rows(rows)
+
+        # 触发 'rows_appended' 事件，插件只需处理新追加的行
+        self.emit("rows_appended", rows=appended)
+        return appended
@@ -15,12 +15,23 @@ class FilterPlugin(BasePlugin):
         self.table.on("row_added", self._on_data_change)
         self.table.on("row_removed", self._on_data_change)
         self.table.on("cell_edited", self._on_data_change)
+        self.table.on("rows_appended", self._on_rows_appended)
 
     def _on_data_change(self, **kwargs):
         # Quando os dados mudarem, remova todos os filtros
         self.clear_all_filters()
         self.regenerate_filters()
 
+    def _on_rows_appended(self, rows, **kwargs):
+        # Linhas novas: acrescenta os valores aos filtros e oculta só as novas linhas filtradas
+        for row in rows:
+            for column, value in row.items():
+                self.filters.setdefault(column, {}).setdefault(value, True)
+
+            row['visible'] = self._is_visible(row)
+            if not row['visible'] and row.get('row_id'):
+                self.tree.delete(row.pop('row_id'))
+
     def regenerate_filters(self):
         new_filters = self._generate_filters()
         merged_filters = {}
@@ -165,17 +176,18 @@ class FilterPlugin(BasePlugin):
 
         self.update_visibility()
 
+    def _is_visible(self, row):
+        for column, filter_values in self.filters.items():
+            row_value = row.get(column)
+            if row_value is not None:
+                if row_value in filter_values:
+                    if not filter_values[row_value]:
+                        return False
+        return True
+
     def update_visibility(self):
         for row in self.data:
-            visible = True
-            for column, filter_values in self.filters.items():
-                row_value = row.get(column)
-                if row_value is not None:
-                    if row_value in filter_values:
-                        if not filter_values[row_value]:
-                            visible = False
-                            break
-            row['visible'] = visible
+            row['visible'] = self._is_visible(row)
         
         self.table.refresh()
 
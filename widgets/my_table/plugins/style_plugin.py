@@ -3,6 +3,7 @@ from .base_plugin import BasePlugin
 class StylePlugin(BasePlugin):
     def run(self):
         self.table.on("table_refreshed", self.apply_styles)
+        self.table.on("rows_appended", self.apply_styles_to_rows)
         self.table.refresh()
 
     def apply_styles(self):
@@ -13,4 +14,15 @@ class StylePlugin(BasePlugin):
             self.tree.item(item_id, tags=(tag,))
 
         self.tree.tag_configure('oddrow', background='#d3d3d3')
-        self.tree.tag_configure('evenrow', background='#a9a9a9')
\ No newline at end of file
+        self.tree.tag_configure('evenrow', background='#a9a9a9')
+
+    def apply_styles_to_rows(self, rows, **kwargs):
+        # 只为新追加（且可见）的行设置斑马纹，已有的行不变
+        item_ids = [row['row_id'] for row in rows if row.get('row_id')]
+        if not item_ids:
+            return
+
+        start = self.tree.index(item_ids[0])
+        for i, item_id in enumerate(item_ids, start=start):
+            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
+            self.tree.item(item_id, tags=(tag,))
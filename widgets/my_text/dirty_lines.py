@@ -0,0 +1,171 @@
+import tkinter as tk
+from contextlib import contextmanager
+
+# 替换控件命令的 Tcl 过程。只有 insert / delete / replace / edit 会回调 Python 记录脏行，
+# 原命令始终由 Tcl 直接调用，它的错误（例如没有选区时的 sel.first）原样抛给调用方
+PROXY_BODY = """
+set op [lindex $args 0]
+if {{$op ni {{insert delete replace edit}}}} {{
+    return [{orig} {{*}}$args]
+}}
+set token [{before} {{*}}$args]
+set code [catch {{{orig} {{*}}$args}} result options]
+if {{$code == 0 && $token ne ""}} {{
+    {after} $token
+}}
+dict incr options -level
+return -options $options $result
+"""
+
+
+class DirtyLinesText(tk.Text):
+    """
+    记录被修改过的行的文本框。
+
+    用 Tcl 过程代理底层的控件命令，拦截 insert / delete / replace（包括键盘输入和粘贴），
+    为每个“使用者”（key）分别记录自上次处理以来被修改过的行号，并在插入或删除换行时同步平移行号。
+    从未处理过的 key 视为所有行都需要处理。
+    """
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+
+        self._dirty_lines = {}      # key → 被修改过的行号集合
+        self._tracking_paused = False
+
+        # 原命令改名后，用同名的 Tcl 过程替换控件命令
+        self._orig_command = self._w + "_orig"
+        self.tk.call("rename", self._w, self._orig_command)
+        self.tk.call("proc", self._w, "args", PROXY_BODY.format(
+            orig=self._orig_command,
+            before=self.register(self._before_change),
+            after=self.register(self._after_change),
+        ))
+
+    def destroy(self):
+        super().destroy()
+        try:
+            self.tk.call("rename", self._w, "")  # 删除代理过程（原命令已随控件删除）
+        except tk.TclError:
+            pass
+
+    def _line_of(self, index):
+        """
+        返回索引所在的行号（不超过最后一行）。
+        """
+        line = int(self.tk.call(self._orig_command, "index", index).split(".")[0])
+        return min(line, self._last_line())
+
+    def _last_line(self):
+        return int(self.tk.call(self._orig_command, "index", "end-1c").split(".")[0])
+
+    def _before_change(self, *args):
+        """
+        在 insert / delete / replace / edit 执行之前调用，返回交给 _after_change 的标记；
+        返回空字符串表示不需要记录。
+        """
+        if not self._dirty_lines:
+            return ""
+
+        command = args[0]
+        if command == "edit":
+            # 撤销/重做不经过 insert/delete，无法知道具体的行，全部重新处理
+            return "reset" if len(args) > 1 and args[1] in ("undo", "redo") else ""
+        if self._tracking_paused:
+            return ""
+
+        try:
+            if command == "insert":
+                first = last = self._line_of(args[1])
+            elif command == "delete":
+                indices = args[1:] if len(args) > 2 else (args[1], f"{args[1]} +1c")
+                lines = [self._line_of(index) for index in indices]
+                first, last = min(lines), max(lines)
+            else:
+                first, last = self._line_of(args[1]), self._line_of(args[2])
+        except (tk.TclError, IndexError, ValueError):
+            return ""  # 参数无效：原命令会报出同样的错误，不记录
+        return f"{first} {last} {self._last_line()}"
+
+    def _after_change(self, token):
+        """
+        原命令成功执行之后调用。
+        """
+        if token == "reset":
+            self.reset_dirty_lines()
+            return
+        first, last, before = map(int, token.split())
+        self._mark_dirty(first, last, self._last_line() - before)
+
+    def _mark_dirty(self, first, last, delta):
+        """
+        把 first..last 行（修改前的行号）被改写、总行数变化 delta 的结果记入所有 key。
+        """
+        changed = set(range(first, last + delta + 1))
+        for key, lines in self._dirty_lines.items():
+            if lines is None:
+                continue
+            shifted = {n + delta if n > last else n for n in lines if n < first or n > last}
+            self._dirty_lines[key] = shifted | changed
+
+    def take_dirty_lines(self, key):
+        """
+        返回自上次以 key 取出以来被修改过的行号（升序列表），并清空记录。
+        如果 key 是第一次使用或之前被重置过，返回 None，表示所有行都需要处理。
+        """
+        lines = self._dirty_lines.get(key)
+        self._dirty_lines[key] = set()
+        return None if lines is None else sorted(lines)
+
+    def reset_dirty_lines(self):
+        """
+        让所有 key 在下次取出时重新处理全部行。
+        """
+        for key in self._dirty_lines:
+            self._dirty_lines[key] = None
+
+    @contextmanager
+    def tracking_paused(self):
+        """
+        在上下文中进行的修改不会被记为脏行（用于标记操作自身的改写）。
+        """
+        self._tracking_paused = True
+        try:
+            yield
+        finally:
+            self._tracking_paused = False
+
+    def transform_lines(self, func, key):
+        """
+        对自上次以 key 处理以来被修改过的行应用 func（单行文本 → 单行文本），
+        只替换结果发生变化的行，整个操作作为一次撤销单元。
+        :param func: 行处理函数，返回值不能包含换行符
+        :param key: 处理类型的标识，不同的 key 分别记录脏行
+        :return: 实际被修改的行数
+        """
+        lines = self.take_dirty_lines(key)
+        last_line = self._last_line()
+        if lines is None:
+            # 处理全部行：一次性读取整个文本，避免逐行调用 get
+            texts = self.get("1.0", "end-1c").split("\n")
+            items = enumerate(texts, start=1)
+        else:
+            items = (
+                (n, self.get(f"{n}.0", f"{n}.end"))
+                for n in lines if n <= last_line
+            )
+
+        changed = 0
+        self.edit_separator()
+        self.configure(autoseparators=False)
+        try:
+            with self.tracking_paused():
+                for n, old in items:
+                    new = func(old)
+                    if new != old:
+                        self.replace(f"{n}.0", f"{n}.end", new)
+                        changed += 1
+        finally:
+            self.configure(autoseparators=True)
+            self.edit_separator()
+        return changed
@@ -1,8 +1,9 @@
 import re
 from .quadruple_click import QuadrupleClickText
 from .replace import TextWithReplace
+from .dirty_lines import DirtyLinesText
 
-class MyText(QuadrupleClickText, TextWithReplace):
+class MyText(QuadrupleClickText, TextWithReplace, DirtyLinesText):
     def __init__(self, master=None, **kw):
         super().__init__(master, **kw)
 
@@ -0,0 +1,68 @@
+import tkinter as tk
+from tkinter import ttk
+
+class UploadProgress(tk.Toplevel):
+    """
+    上传进度窗口类
+    继承自tkinter.Toplevel,显示已上传的字节数和进度条,并提供取消按钮
+    """
+    def __init__(self, master, page_id, on_cancel=None, title="正在上传"):
+        """
+        初始化上传进度窗口
+
+        参数:
+            master: 父窗口
+            page_id: 上传所属页面的ID
+            on_cancel: 点击取消按钮(或关闭窗口)时调用的函数
+            title: 窗口标题
+        """
+        super().__init__(master)
+        self.page_id = page_id
+        self.on_cancel = on_cancel
+
+        self.title(title)
+        self.geometry("320x130")
+        self.resizable(False, False)
+        self.transient(master)
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        self.label = ttk.Label(self, text="正在准备上传...", font=("微软雅黑", 11))
+        self.label.pack(pady=(15, 5))
+
+        self.progressbar = ttk.Progressbar(self, length=260, mode="determinate", maximum=100)
+        self.progressbar.pack(pady=5)
+
+        self.cancel_button = ttk.Button(self, text="取消", command=self.cancel)
+        self.cancel_button.pack(pady=5)
+
+        self.update_idletasks()
+
+        # 在主窗口中居中显示
+        x = master.winfo_rootx() + (master.winfo_width() - self.winfo_width()) // 2
+        y = master.winfo_rooty() + (master.winfo_height() - self.winfo_height()) // 2
+        self.geometry(f"+{x}+{y}")
+
+    def update_progress(self, sent, total):
+        """
+        更新进度显示
+
+        参数:
+            sent: 已发送的字节数
+            total: 总字节数
+        """
+        percent = sent * 100 / total if total else 100
+        self.progressbar["value"] = percent
+        if sent >= total:
+            self.label.config(text="上传完成，正在等待服务器处理...")
+        else:
+            self.label.config(text=f"已上传 {sent / 1048576:.1f} / {total / 1048576:.1f} MB（{percent:.0f}%）")
+
+    def cancel(self):
+        """
+        请求取消上传，窗口在上传真正结束后由调用方关闭
+        """
+        self.cancel_button.config(state="disabled")
+        self.label.config(text="正在取消...")
+        if self.on_cancel:
+            self.on_cancel(self.page_id)